@@ -0,0 +1,73 @@
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import Connection
+from sqlalchemy import pool
+
+from alembic import context
+
+from settings import PG_PROJECTS_URL
+from core.database import Base
+import users.models  # noqa: F401  Alembic does NOT auto-discover models
+import auth.models  # noqa: F401
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging.
+# This line sets up loggers basically.
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode, emitting SQL to the script output."""
+    context.configure(
+        url=PG_PROJECTS_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_schemas=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations(connection: Connection) -> None:
+    """Sync function that receives the underlying sync Connection."""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_schemas=True
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    """Run migrations in 'online' mode with async engine."""
+
+    # Create a temporary async engine with NullPool (recommended for migrations)
+    connectable = create_async_engine(
+        PG_PROJECTS_URL,
+        poolclass=pool.NullPool,
+    )
+
+    async with connectable.connect() as async_conn:
+        # Bridge to sync: passes the real sync Connection to the function above
+        await async_conn.run_sync(run_migrations)
+
+    # Clean up
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,56 @@
+"""create users and sessions tables
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "starter-fastapi-project"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f'CREATE SCHEMA IF NOT EXISTS "{SCHEMA}"')
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        schema=SCHEMA,
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True, schema=SCHEMA)
+
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("refresh_token_hash", sa.String(length=255), nullable=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], [f"{SCHEMA}.users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("sessions", schema=SCHEMA)
+    op.drop_index("ix_users_email", table_name="users", schema=SCHEMA)
+    op.drop_table("users", schema=SCHEMA)
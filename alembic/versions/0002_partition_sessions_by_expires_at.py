@@ -0,0 +1,90 @@
+"""range-partition sessions by expires_at
+
+Sessions are only ever inserted and expire after a day, so the table is
+rebuilt as a RANGE partitioned table with one partition per month of
+expires_at. Old months can then be removed with DROP TABLE instead of
+row-by-row DELETEs (see auth.services.run_session_sweeper, which detects
+the partitioned table and creates the following months' partitions).
+
+Postgres requires the partition key in the primary key, so the key becomes
+(id, expires_at); ids keep coming from the same sequence.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = '"starter-fastapi-project"'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"ALTER TABLE {SCHEMA}.sessions RENAME TO sessions_unpartitioned")
+    op.execute(f"ALTER TABLE {SCHEMA}.sessions_unpartitioned RENAME CONSTRAINT sessions_pkey TO sessions_unpartitioned_pkey")
+    op.execute(f"ALTER SEQUENCE {SCHEMA}.sessions_id_seq OWNED BY NONE")
+
+    op.execute(
+        f"CREATE TABLE {SCHEMA}.sessions "
+        f"(LIKE {SCHEMA}.sessions_unpartitioned INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE (expires_at)"
+    )
+    op.execute(f"ALTER TABLE {SCHEMA}.sessions ADD PRIMARY KEY (id, expires_at)")
+    op.execute(
+        f"ALTER TABLE {SCHEMA}.sessions ADD FOREIGN KEY (user_id) "
+        f"REFERENCES {SCHEMA}.users (id)"
+    )
+    op.execute(f"CREATE TABLE {SCHEMA}.sessions_default PARTITION OF {SCHEMA}.sessions DEFAULT")
+
+    # One partition per month, from the oldest existing row until two months ahead.
+    op.execute(f"""
+        DO $$
+        DECLARE
+            part_start date := date_trunc('month', coalesce(
+                (SELECT min(expires_at) FROM {SCHEMA}.sessions_unpartitioned), now()
+            ));
+        BEGIN
+            WHILE part_start <= date_trunc('month', now() + interval '2 months') LOOP
+                EXECUTE format(
+                    'CREATE TABLE {SCHEMA}.%I PARTITION OF {SCHEMA}.sessions FOR VALUES FROM (%L) TO (%L)',
+                    'sessions_p' || to_char(part_start, 'YYYYMM'), part_start, part_start + interval '1 month'
+                );
+                part_start := part_start + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+
+    op.execute(f"INSERT INTO {SCHEMA}.sessions SELECT * FROM {SCHEMA}.sessions_unpartitioned")
+    op.execute(f"DROP TABLE {SCHEMA}.sessions_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {SCHEMA}.sessions_id_seq OWNED BY {SCHEMA}.sessions.id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"ALTER TABLE {SCHEMA}.sessions RENAME TO sessions_partitioned")
+    op.execute(f"ALTER TABLE {SCHEMA}.sessions_partitioned RENAME CONSTRAINT sessions_pkey TO sessions_partitioned_pkey")
+    op.execute(f"ALTER SEQUENCE {SCHEMA}.sessions_id_seq OWNED BY NONE")
+
+    op.execute(
+        f"CREATE TABLE {SCHEMA}.sessions "
+        f"(LIKE {SCHEMA}.sessions_partitioned INCLUDING DEFAULTS)"
+    )
+    op.execute(f"ALTER TABLE {SCHEMA}.sessions ADD PRIMARY KEY (id)")
+    op.execute(
+        f"ALTER TABLE {SCHEMA}.sessions ADD FOREIGN KEY (user_id) "
+        f"REFERENCES {SCHEMA}.users (id)"
+    )
+
+    op.execute(f"INSERT INTO {SCHEMA}.sessions SELECT * FROM {SCHEMA}.sessions_partitioned")
+    op.execute(f"DROP TABLE {SCHEMA}.sessions_partitioned")
+    op.execute(f"ALTER SEQUENCE {SCHEMA}.sessions_id_seq OWNED BY {SCHEMA}.sessions.id")
@@ -0,0 +1,42 @@
+"""covering index on sessions for principal resolution
+
+get_current_user resolves a token with one query joining sessions to users
+(auth.repositories.get_principal). With user_id, is_active and expires_at in
+the index, the sessions side is an index-only scan and the heap is never
+visited. sessions is partitioned (0002), so the index is created on every
+partition; CREATE INDEX CONCURRENTLY is not available for partitioned
+tables, run this outside peak traffic on large tables.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "starter-fastapi-project"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_sessions_id_covering",
+        "sessions",
+        ["id"],
+        schema=SCHEMA,
+        postgresql_include=["user_id", "is_active", "expires_at"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sessions_id_covering", table_name="sessions", schema=SCHEMA)
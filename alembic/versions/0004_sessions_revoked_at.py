@@ -0,0 +1,49 @@
+"""sessions.revoked_at for the revocation filter
+
+Logging out (or deactivating a user) now stamps revoked_at. Workers running
+with AUTH_STATELESS_ENABLED poll the sessions revoked since their last
+poll (core.revocation), served by a partial index that only holds revoked
+sessions. Sessions revoked before this migration have no revoked_at; their
+tokens expire within JWT_ACCESS_TOKEN_EXPIRE_MINUTES, so enable stateless
+validation no earlier than that after upgrading.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "starter-fastapi-project"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "sessions",
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+        schema=SCHEMA,
+    )
+    op.create_index(
+        "ix_sessions_revoked_at",
+        "sessions",
+        ["revoked_at"],
+        schema=SCHEMA,
+        postgresql_where=sa.text("revoked_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sessions_revoked_at", table_name="sessions", schema=SCHEMA)
+    op.drop_column("sessions", "revoked_at", schema=SCHEMA)
@@ -0,0 +1,58 @@
+"""sessions.last_seen_at and the auth_events audit table
+
+Both are written behind by auth.services (session_activity, auth_audit):
+last-seen times are coalesced per session and applied with one
+UPDATE ... FROM (VALUES ...) per batch, audit events with multi-row INSERTs.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "starter-fastapi-project"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "sessions",
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True),
+        schema=SCHEMA,
+    )
+
+    op.create_table(
+        "auth_events",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("event", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("session_id", sa.Integer(), nullable=True),
+        sa.Column("email", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        schema=SCHEMA,
+    )
+    op.create_index(
+        "ix_auth_events_user_id_created_at",
+        "auth_events",
+        ["user_id", "created_at"],
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_auth_events_user_id_created_at", table_name="auth_events", schema=SCHEMA)
+    op.drop_table("auth_events", schema=SCHEMA)
+    op.drop_column("sessions", "last_seen_at", schema=SCHEMA)
@@ -0,0 +1,46 @@
+"""partial index on the active sessions of a user
+
+GET /auth/sessions lists a user's active sessions and POST /auth/logout-all
+(and deactivating a user) revokes them with one UPDATE ... RETURNING. Both
+filter on user_id and is_active, which had no index, so each was a
+sequential scan over every partition. The index only holds active
+sessions, keeping it small however many logged out sessions are retained
+until the sweeper removes them. Its predicate is written exactly as the
+queries write it (is_active IS TRUE) so the planner always matches it.
+sessions is partitioned (0002), CREATE INDEX CONCURRENTLY is not
+available; run this outside peak traffic on large tables.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "starter-fastapi-project"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_sessions_user_id_active",
+        "sessions",
+        ["user_id", "expires_at"],
+        schema=SCHEMA,
+        postgresql_where=sa.text("is_active IS TRUE"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sessions_user_id_active", table_name="sessions", schema=SCHEMA)
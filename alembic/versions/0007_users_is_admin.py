@@ -0,0 +1,38 @@
+"""users.is_admin for the admin-only user routes
+
+Listing, exporting and bulk importing users is restricted to admins.
+Existing users are not admins; grant the flag with
+`python cli.py set-admin <email>`.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "starter-fastapi-project"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("is_admin", sa.Boolean(), server_default=sa.false(), nullable=False),
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "is_admin", schema=SCHEMA)
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, DateTime, Boolean, String
+from sqlalchemy import BigInteger, ForeignKey, DateTime, Boolean, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, timezone
 
@@ -6,13 +6,113 @@ from core.database import Base
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Lets get_principal read everything it needs from sessions with an index-only scan
+        Index(
+            "ix_sessions_id_covering",
+            "id",
+            postgresql_include=["user_id", "is_active", "expires_at"],
+        ),
+        # Incremental polling of recent revocations by the revocation filter
+        Index(
+            "ix_sessions_revoked_at",
+            "revoked_at",
+            postgresql_where=text("revoked_at IS NOT NULL"),
+        ),
+        # Listing and revoking a user's active sessions; the predicate matches the queries' is_(True)
+        Index(
+            "ix_sessions_user_id_active",
+            "user_id",
+            "expires_at",
+            postgresql_where=text("is_active IS TRUE"),
+        ),
+        Base.__table_args__,
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    # Primary key (id, expires_at) as in migration 0002: a partitioned table needs its partition key in it.
+    # id stays autoincrementing, which SQLAlchemy only assumes for single-column keys.
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("starter-fastapi-project.users.id"))
 
     refresh_token_hash: Mapped[str | None] = mapped_column(String(255))
-    expires_at: Mapped[datetime]
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
 
     is_active: Mapped[bool] = mapped_column(default=True)
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))   # Set when is_active turns False
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True)) # Written behind, see auth.services.session_activity
     # created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
-    created_at: Mapped[datetime] = mapped_column(default=datetime.now(timezone.utc))
+    # Callable default: evaluated per insert, not once at import time
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class AuthEvent(Base):
+    __tablename__ = "auth_events"
+    __table_args__ = (
+        Index("ix_auth_events_user_id_created_at", "user_id", "created_at"),
+        Base.__table_args__,
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    event: Mapped[str] = mapped_column(String(32))
+    user_id: Mapped[int | None] = mapped_column(Integer)
+    session_id: Mapped[int | None] = mapped_column(Integer)
+    email: Mapped[str | None] = mapped_column(String(255))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    """
+    Audit record of an authentication event, written in batches.
+    Attributes:
+        id (int): Primary key.
+        event (str): "login", "login_failed", "refresh", "logout" or "logout_all".
+        user_id (int | None): The user, when known.
+        session_id (int | None): The session, when one is involved.
+        email (str | None): The email a failed login was attempted for.
+        created_at (datetime): When the event happened (not when it was flushed).
+    Notes:
+        No foreign keys: audit rows outlive swept sessions, and the batched
+        insert must not fail because a referenced row is gone.
+    """
+
+
+class Principal:
+    """
+    The authenticated caller of a request, resolved from an access token.
+    A plain slotted object built from one joined row of sessions and users
+    (see auth.repositories.get_principal), much cheaper to create and cache
+    than the two ORM objects it replaces. It exposes `id`, `email` and
+    `is_active` like users.models.User for code that only reads those.
+    Attributes:
+        id (int): The user id.
+        email (str | None): The user's email address, None when the token was
+            validated statelessly (no database read).
+        is_active (bool): Whether the user account is active.
+        is_admin (bool | None): Whether the user is an admin, None when the token
+            was validated statelessly; see core.dependencies.require_admin.
+        session_id (int): The session the token belongs to.
+        session_active (bool): False once the session was logged out.
+        expires_at (datetime): When the session expires, or the token when validated statelessly.
+    """
+
+    __slots__ = ("id", "email", "is_active", "is_admin", "session_id", "session_active", "expires_at")
+
+    def __init__(
+        self,
+        id: int,
+        email: str | None,
+        is_active: bool,
+        is_admin: bool | None,
+        session_id: int,
+        session_active: bool,
+        expires_at: datetime,
+    ):
+        self.id = id
+        self.email = email
+        self.is_active = is_active
+        self.is_admin = is_admin
+        self.session_id = session_id
+        self.session_active = session_active
+        self.expires_at = expires_at
+
+    @property
+    def user_id(self) -> int:
+        return self.id
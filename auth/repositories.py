@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select
-from datetime import datetime, timedelta
+from sqlalchemy import DateTime, Integer, Row, column, delete, func, insert, or_, select, text, tuple_, update, values
+from datetime import date, datetime, timedelta
 
-from auth.models import Session
+from core.singleflight import single_flight
+from auth.models import AuthEvent, Principal, Session
+from users.models import User
 
 
 async def create_session(
@@ -14,42 +16,384 @@ async def create_session(
 ) -> Session:
     """
     Create a new session for a user in the database.
+    Uses a single INSERT ... RETURNING statement, so the generated id and
+    defaults come back without a separate SELECT.
     Args:
         db (AsyncSession): The asynchronous database session.
         user_id (int): The ID of the user for whom the session is being created.
     Returns:
         Session: The newly created session object with auto-generated fields populated.
     Raises:
-        SQLAlchemyError: If there is a database error during commit or refresh.
+        SQLAlchemyError: If there is a database error during insert or commit.
     """
     
-    session = Session(
-        user_id=user_id,
-        expires_at=expires_at,
-        refresh_token_hash=refresh_token_hash,
+    stmt = (
+        insert(Session)
+        .values(
+            user_id=user_id,
+            expires_at=expires_at,
+            refresh_token_hash=refresh_token_hash,
+        )
+        .returning(Session)
     )
-    db.add(session)
+    session = await db.scalar(stmt)
     await db.commit()
-    await db.refresh(session)
     return session
 
-async def get_session_by_id(
+@single_flight
+async def get_principal(
     db: AsyncSession,
-    id: int,
-) -> Session | None:
+    session_id: int,
+) -> Principal | None:
     """
-    Retrieve a Session from the database by their id.
-    This function queries the database to find a Session with the specified id.
-    It performs an asynchronous database lookup using SQLAlchemy's select statement.
+    Resolve a session id to the session and its user in one query.
+    Sessions are joined to users by primary key and only the columns the
+    auth check needs are selected, so an authenticated request costs one
+    round trip, the sessions side is answered from ix_sessions_id_covering,
+    and no ORM objects are materialized.
     Args:
         db (AsyncSession): An async SQLAlchemy session object for database operations.
-        id (int): The id of the Session to retrieve.
+        session_id (int): The sid claim of the access token.
     Returns:
-        Session | None: A Session object if a Session with the given id exists,
-                     otherwise None if no matching Session is found.
-    Raises:
-        None: This function does not raise exceptions; it returns None for no matches.
+        Principal | None: The caller, or None if no such session exists.
+            Inactive or expired sessions and inactive users are returned as
+            well; the caller decides how to reject them.
+    """
+    stmt = (
+        select(
+            User.id,
+            User.email,
+            User.is_active,
+            User.is_admin,
+            Session.id,
+            Session.is_active,
+            Session.expires_at,
+        )
+        .join(User, User.id == Session.user_id)
+        .where(Session.id == session_id)
+    )
+    row = (await db.execute(stmt)).first()
+    return Principal(*row) if row is not None else None
+
+async def deactivate_session(
+    db: AsyncSession,
+    id: int,
+) -> bool:
+    """
+    Mark a session inactive with a single UPDATE by primary key.
+    revoked_at is stamped with the database clock, which is what the
+    revocation filter of other workers polls for.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        id (int): The id of the session to deactivate.
+    Returns:
+        bool: True if a session with the given id was updated, otherwise False.
+    """
+    stmt = (
+        update(Session)
+        .where(Session.id == id, Session.is_active.is_(True))
+        .values(is_active=False, revoked_at=func.clock_timestamp())
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount > 0
+
+async def list_user_sessions(
+    db: AsyncSession,
+    user_id: int,
+) -> list[Row]:
+    """
+    Return the active, unexpired sessions of a user, newest first.
+    Served from the partial index ix_sessions_user_id_active, which only
+    holds active sessions.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        user_id (int): The user whose sessions are listed.
+    Returns:
+        list[Row]: Rows of (id, created_at, expires_at, last_seen_at).
+    """
+    stmt = (
+        select(Session.id, Session.created_at, Session.expires_at, Session.last_seen_at)
+        .where(
+            Session.user_id == user_id,
+            Session.is_active.is_(True),
+            Session.expires_at > func.now(),
+        )
+        .order_by(Session.expires_at.desc(), Session.id.desc())
+    )
+    return list((await db.execute(stmt)).all())
+
+async def revoke_user_sessions(
+    db: AsyncSession,
+    user_id: int,
+    *,
+    except_session_id: int | None = None,
+) -> list[int]:
+    """
+    Mark every active session of a user inactive in one UPDATE ... RETURNING.
+    The rows are found through the partial index ix_sessions_user_id_active,
+    so the cost follows the user's active sessions, not the table size.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        user_id (int): The user whose sessions are revoked.
+        except_session_id (int | None): A session to keep, e.g. the caller's own.
+    Returns:
+        list[int]: The ids of the sessions that were revoked.
+    """
+    stmt = (
+        update(Session)
+        .where(Session.user_id == user_id, Session.is_active.is_(True))
+        .values(is_active=False, revoked_at=func.clock_timestamp())
+        .returning(Session.id)
+    )
+    if except_session_id is not None:
+        stmt = stmt.where(Session.id != except_session_id)
+    session_ids = list((await db.scalars(stmt)).all())
+    await db.commit()
+    return session_ids
+
+async def list_revoked_sessions(
+    db: AsyncSession,
+    *,
+    since: datetime,
+) -> list[Row]:
+    """
+    Return the sessions revoked after `since`, oldest revocation first.
+    Served from the partial index on revoked_at, so polling it every few
+    seconds stays cheap however large the sessions table is.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        since (datetime): Lower bound (exclusive) of revoked_at.
+    Returns:
+        list[Row]: Rows of (id, revoked_at).
+    """
+    stmt = (
+        select(Session.id, Session.revoked_at)
+        .where(Session.revoked_at > since)
+        .order_by(Session.revoked_at)
+    )
+    return list((await db.execute(stmt)).all())
+
+async def rotate_refresh_token(
+    db: AsyncSession,
+    *,
+    session_id: int,
+    old_hash: str,
+    new_hash: str,
+) -> int | None:
+    """
+    Swap a session's refresh token hash in one statement.
+    The UPDATE only matches an active, unexpired session whose stored hash
+    equals old_hash, so lookup, validation and rotation are a single primary
+    key round trip, and a refresh token can be exchanged at most once.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        session_id (int): The id of the session the refresh token belongs to.
+        old_hash (str): Hash of the presented refresh token.
+        new_hash (str): Hash of the replacement refresh token.
+    Returns:
+        int | None: The session's user_id if the token was rotated, otherwise None.
+    """
+    stmt = (
+        update(Session)
+        .where(
+            Session.id == session_id,
+            Session.refresh_token_hash == old_hash,
+            Session.is_active.is_(True),
+            Session.expires_at > func.now(),
+        )
+        .values(refresh_token_hash=new_hash)
+        .returning(Session.user_id)
+    )
+    user_id = await db.scalar(stmt)
+    await db.commit()
+    return user_id
+
+async def delete_expired_sessions(
+    db: AsyncSession,
+    *,
+    before: datetime,
+    limit: int,
+) -> int:
+    """
+    Delete up to `limit` sessions that expired before the given time.
+    Rows are picked with FOR UPDATE SKIP LOCKED, so sweepers running in
+    several workers delete disjoint batches instead of blocking each other.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        before (datetime): Sessions with expires_at earlier than this are deleted.
+        limit (int): Maximum number of rows deleted by this statement.
+    Returns:
+        int: The number of deleted sessions.
     """
-    stmt = select(Session).where(Session.id == id)
+    expired = (
+        select(Session.id, Session.expires_at)
+        .where(Session.expires_at < before)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        delete(Session)
+        .where(tuple_(Session.id, Session.expires_at).in_(expired))
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount
+
+async def touch_sessions(
+    db: AsyncSession,
+    last_seen: list[tuple[int, datetime]],
+) -> int:
+    """
+    Set last_seen_at of many sessions in one UPDATE ... FROM (VALUES ...).
+    A timestamp never moves backwards, so batches flushed by different
+    workers can be applied in any order.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        last_seen (list[tuple[int, datetime]]): (session id, last seen) pairs,
+            one per session.
+    Returns:
+        int: The number of sessions updated.
+    """
+    if not last_seen:
+        return 0
+    activity = values(
+        column("id", Integer),
+        column("last_seen_at", DateTime(timezone=True)),
+        name="activity",
+    ).data(last_seen)
+    stmt = (
+        update(Session)
+        .where(
+            Session.id == activity.c.id,
+            or_(Session.last_seen_at.is_(None), Session.last_seen_at < activity.c.last_seen_at),
+        )
+        .values(last_seen_at=activity.c.last_seen_at)
+        .execution_options(synchronize_session=False)
+    )
     result = await db.execute(stmt)
-    return result.scalar_one_or_none()  # Return one object or None if no such user
+    await db.commit()
+    return result.rowcount
+
+async def insert_auth_events(
+    db: AsyncSession,
+    events: list[dict],
+) -> None:
+    """
+    Insert audit events with multi-row INSERT statements.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        events (list[dict]): Rows with event, user_id, session_id, email and created_at keys.
+    """
+    if not events:
+        return
+    await db.execute(insert(AuthEvent), events)     # insertmanyvalues: batched multi-row VALUES
+    await db.commit()
+
+
+# Partition maintenance, only valid after the sessions partitioning migration.
+# Partitions are named sessions_pYYYYMM and hold one month of expires_at.
+# ------------------------------------------------------------------
+
+SESSIONS_SCHEMA = Session.__table__.schema
+
+async def sessions_are_partitioned(db: AsyncSession) -> bool:
+    """
+    Whether the sessions table is partitioned, i.e. migration 0002 ran.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        bool: True if sessions is listed in pg_partitioned_table.
+    """
+    result = await db.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "JOIN pg_class parent ON parent.oid = pg_partitioned_table.partrelid "
+            "JOIN pg_namespace ns ON ns.oid = parent.relnamespace "
+            "WHERE parent.relname = 'sessions' AND ns.nspname = :schema)"
+        ),
+        {"schema": SESSIONS_SCHEMA},
+    )
+    return bool(result.scalar())
+
+async def create_session_partition(
+    db: AsyncSession,
+    *,
+    month: date,
+) -> bool:
+    """
+    Create the monthly sessions partition starting at `month`, if missing.
+    Rows of that month that already landed in sessions_default (e.g. while
+    no sweeper created partitions) are moved into the new partition in the
+    same transaction, since Postgres refuses to add a partition whose range
+    the default partition still holds rows for. The partition is built as
+    a plain table and attached afterwards; writes to sessions_default are
+    blocked for the move, those to every other partition are not.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        month (date): The first day of the month to cover.
+    Returns:
+        bool: True if the partition was created, False if it already existed.
+    """
+    name = f"sessions_p{month:%Y%m}"
+    exists = await db.scalar(
+        text("SELECT to_regclass(:name) IS NOT NULL"),
+        {"name": f'"{SESSIONS_SCHEMA}"."{name}"'},
+    )
+    if exists:
+        await db.rollback()
+        return False
+
+    next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    bounds = f"FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+    await db.execute(text(f'LOCK TABLE "{SESSIONS_SCHEMA}".sessions_default IN SHARE ROW EXCLUSIVE MODE'))
+    await db.execute(text(
+        f'CREATE TABLE "{SESSIONS_SCHEMA}"."{name}" '
+        f'(LIKE "{SESSIONS_SCHEMA}".sessions INCLUDING DEFAULTS)'
+    ))
+    await db.execute(text(
+        f'WITH moved AS (DELETE FROM "{SESSIONS_SCHEMA}".sessions_default '
+        f"WHERE expires_at >= '{month.isoformat()}' AND expires_at < '{next_month.isoformat()}' RETURNING *) "
+        f'INSERT INTO "{SESSIONS_SCHEMA}"."{name}" SELECT * FROM moved'
+    ))
+    await db.execute(text(
+        f'ALTER TABLE "{SESSIONS_SCHEMA}".sessions ATTACH PARTITION "{SESSIONS_SCHEMA}"."{name}" FOR VALUES {bounds}'
+    ))
+    await db.commit()
+    return True
+
+async def list_session_partitions(db: AsyncSession) -> list[str]:
+    """
+    Return the names of the monthly sessions partitions.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+    Returns:
+        list[str]: Partition table names like "sessions_p202610", oldest first.
+    """
+    result = await db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_namespace ns ON ns.oid = parent.relnamespace "
+            "WHERE parent.relname = 'sessions' AND ns.nspname = :schema "
+            "AND child.relname ~ '^sessions_p[0-9]{6}$' "
+            "ORDER BY child.relname"
+        ),
+        {"schema": SESSIONS_SCHEMA},
+    )
+    return list(result.scalars().all())
+
+async def drop_session_partition(
+    db: AsyncSession,
+    name: str,
+) -> None:
+    """
+    Drop one monthly sessions partition, removing all its rows in O(1).
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        name (str): A partition name returned by list_session_partitions.
+    """
+    await db.execute(text(f'DROP TABLE IF EXISTS "{SESSIONS_SCHEMA}"."{name}"'))
+    await db.commit()
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
-from .schemas import LoginRequest, LoginResponse, TokenResponse
+from core.dependencies import get_current_user
+from core.security import PasswordHasherBusyError
+from core.rate_limit import RateLimitExceededError, check_rate_limits, login_email_limiter, login_ip_limiter
+from core.responses import FAST_JSON_ENABLED, FastJSONResponse
+from .models import Principal
+from .schemas import LoginRequest, LoginResponse, LogoutAllResponse, RefreshRequest, SessionRead, TokenResponse
 from . import services
 
 
@@ -17,25 +22,35 @@ router = APIRouter(
 )
 async def login(
     payload: LoginRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Handles user login by validating credentials and returning a user token.
     Args:
         payload (LoginRequest): The login request containing user credentials.
+        request (Request): The incoming request, its client address keys the per-IP rate limit.
         db (AsyncSession, optional): The database session dependency. Defaults to the result of get_db.
     Returns:
         str: A user token if the login is successful.
     Raises:
         HTTPException: If the login fails due to invalid credentials, a 401 UNAUTHORIZED error is raised with a detailed message.
+        HTTPException: If the client IP or the email ran out of login attempts, a 429 TOO MANY REQUESTS error is raised with a Retry-After header.
+        HTTPException: If the password hashing pool is saturated, a 503 SERVICE UNAVAILABLE error is raised with a Retry-After header.
     """
     
     try:
+        check_rate_limits(
+            (login_ip_limiter, request.client.host if request.client else None),
+            (login_email_limiter, payload.email.lower()),
+        )
         user_token = await services.login_user(
             db,
             email=payload.email,
             password=payload.password,
         )
+        if FAST_JSON_ENABLED:
+            return FastJSONResponse(user_token)     # Already a plain dict of strings
         return user_token
 
     except ValueError as exc:
@@ -43,3 +58,103 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(exc),
         )
+
+    except RateLimitExceededError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    except PasswordHasherBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        )
+
+@router.post(
+    "/refresh",
+    response_model=TokenResponse,
+)
+async def refresh(
+    payload: RefreshRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Exchanges a refresh token for a new access token without re-checking the password.
+    Args:
+        payload (RefreshRequest): The refresh token issued at login or by a previous refresh.
+        db (AsyncSession, optional): The database session dependency. Defaults to the result of get_db.
+    Returns:
+        TokenResponse: A new access token and a rotated refresh token.
+    Raises:
+        HTTPException: If the refresh token is invalid, already used or its session ended, a 401 UNAUTHORIZED error is raised.
+    """
+
+    try:
+        tokens = await services.refresh_access_token(
+            db,
+            refresh_token=payload.refresh_token,
+        )
+        if FAST_JSON_ENABLED:
+            return FastJSONResponse(tokens)
+        return tokens
+
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(exc),
+        )
+
+@router.get(
+    "/sessions",
+    response_model=list[SessionRead],
+)
+async def list_sessions(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Lists the caller's active sessions, newest first.
+    Read from the primary, so sessions revoked a moment ago never reappear
+    from a lagging replica.
+    Args:
+        db (AsyncSession, optional): The database session dependency. Defaults to the result of get_db.
+        current_user (Principal): The authenticated caller.
+    Returns:
+        list[SessionRead]: The active sessions, the one of this request flagged as current.
+    """
+
+    return await services.list_sessions(
+        db,
+        user_id=current_user.user_id,
+        current_session_id=current_user.session_id,
+    )
+
+@router.post(
+    "/logout-all",
+    response_model=LogoutAllResponse,
+)
+async def logout_all(
+    keep_current: bool = Query(False, description="Keep the session of this request logged in"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Logs the caller out everywhere with a single set-based revocation.
+    Args:
+        keep_current (bool): Revoke every session but the one of this request.
+        db (AsyncSession, optional): The database session dependency. Defaults to the result of get_db.
+        current_user (Principal): The authenticated caller.
+    Returns:
+        LogoutAllResponse: The number of sessions revoked.
+    """
+
+    revoked = await services.logout_all_sessions(
+        db,
+        user_id=current_user.user_id,
+        current_session_id=current_user.session_id,
+        keep_current=keep_current,
+    )
+    return {"revoked": revoked}
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, EmailStr
 
 
@@ -13,6 +15,20 @@ class LoginResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class TokenResponse(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str
+
+class SessionRead(BaseModel):
+    id: int
+    created_at: datetime
+    expires_at: datetime
+    last_seen_at: datetime | None      # Written behind, may trail by a few seconds
+    current: bool                       # The session of the token used for this request
+
+class LogoutAllResponse(BaseModel):
+    revoked: int
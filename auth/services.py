@@ -1,9 +1,96 @@
+import asyncio
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 
 from users.services import authenticate_user
-from auth.repositories import create_session, get_session_by_id
-from core.security import create_access_token
+from auth.repositories import (
+    create_session,
+    deactivate_session,
+    list_user_sessions,
+    revoke_user_sessions,
+    rotate_refresh_token,
+    delete_expired_sessions,
+    create_session_partition,
+    list_session_partitions,
+    drop_session_partition,
+    sessions_are_partitioned,
+    list_revoked_sessions,
+    touch_sessions,
+    insert_auth_events,
+)
+from core.database import AsyncSessionLocal, try_advisory_lock
+from core.security import (
+    create_access_token,
+    generate_refresh_token_secret,
+    hash_refresh_token_secret,
+)
+from core.cache import principal_cache
+from core.revocation import revocation_filter
+from core.write_behind import WriteBehindBuffer
+from settings import (
+    REVOCATION_REFRESH_SECONDS,
+    SESSION_SWEEP_INTERVAL_SECONDS,
+    SESSION_SWEEP_BATCH_SIZE,
+    SESSION_RETENTION_HOURS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Re-read revocations this far behind the watermark, for UPDATEs that
+# committed after a poll with an earlier revoked_at.
+REVOCATION_POLL_OVERLAP = timedelta(seconds=5)
+
+# Advisory lock id taken by the one worker doing partition maintenance per sweep.
+SESSION_PARTITIONS_LOCK_KEY = 0x5E55_1045
+
+
+# Write-behind buffers below:
+# Session last-seen times and audit events are recorded in memory on the
+# request path and written in batches by the buffers' background tasks
+# (started and flushed on shutdown by the application lifespan).
+# ------------------------------------------------------------------
+
+async def _flush_session_activity(last_seen: list[tuple[int, datetime]]):
+    async with AsyncSessionLocal() as db:
+        await touch_sessions(db, last_seen)
+
+async def _flush_auth_events(events: list[dict]):
+    async with AsyncSessionLocal() as db:
+        await insert_auth_events(db, events)
+
+session_activity = WriteBehindBuffer(
+    "session_activity",
+    _flush_session_activity,
+    merge=lambda pending, new: new if new[1] > pending[1] else pending,
+)
+auth_audit = WriteBehindBuffer("auth_audit", _flush_auth_events)
+
+def record_session_activity(session_id: int) -> None:
+    """
+    Note that a session was just used; written behind, coalesced per session.
+    """
+
+    session_activity.add((session_id, datetime.now(timezone.utc)), key=session_id)
+
+def record_auth_event(
+    event: str,
+    *,
+    user_id: int | None = None,
+    session_id: int | None = None,
+    email: str | None = None,
+) -> None:
+    """
+    Queue an audit event ("login", "login_failed", "refresh", "logout", "logout_all"); written behind.
+    """
+
+    auth_audit.add({
+        "event": event,
+        "user_id": user_id,
+        "session_id": session_id,
+        "email": email,
+        "created_at": datetime.now(timezone.utc),
+    })
 
 
 async def login_user(
@@ -21,39 +108,98 @@ async def login_user(
     Returns:
         dict: A dictionary containing:
             - access_token (str): JWT token for authenticating subsequent requests.
+            - refresh_token (str): Single-use token for POST /auth/refresh.
             - token_type (str): The token type, always "bearer".
     Raises:
         ValueError: If the user does not exist, credentials are invalid, or user is inactive.
     Notes:
         - Session expires after 1 day from creation.
         - The access token is tied to both user_id and session_id.
+        - Only a SHA-256 hash of the refresh token is stored.
     """
     
     user = await authenticate_user(db, email=email, password=password)
 
     if not user:
+        record_auth_event("login_failed", email=email)
         raise ValueError("Invalid email or password")
         
     if not user.is_active:
+        record_auth_event("login_failed", user_id=user.id, email=email)
         raise ValueError("Inactive user")
 
     # if not user or not user.is_active:
     #     raise ValueError("Invalid credentials")
 
+    refresh_secret = generate_refresh_token_secret()
+
     session = await create_session(
         db,
         user_id=user.id,
         expires_at=datetime.now(timezone.utc) + timedelta(days=1),
         # expires_at=datetime.utcnow() + timedelta(days=1),
+        refresh_token_hash=hash_refresh_token_secret(refresh_secret),
     )
 
     access_token = create_access_token(
         user_id=user.id,
         session_id=session.id,
     )
+    record_auth_event("login", user_id=user.id, session_id=session.id)
+
+    return {
+        "access_token": access_token,
+        "refresh_token": f"{session.id}.{refresh_secret}",
+        "token_type": "bearer",
+    }
+
+async def refresh_access_token(
+    db: AsyncSession,
+    *,
+    refresh_token: str,
+):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+    Refresh tokens have the form "<session_id>.<secret>". The session is found
+    by primary key and its stored hash is swapped for the new one in the same
+    statement, so the presented token is consumed and cannot be replayed.
+    No password hashing is involved.
+    Args:
+        db: Database session object for executing queries.
+        refresh_token (str): The refresh token from login or a previous refresh.
+    Returns:
+        dict: A dictionary containing:
+            - access_token (str): New JWT token for the same session.
+            - refresh_token (str): Replacement refresh token.
+            - token_type (str): The token type, always "bearer".
+    Raises:
+        ValueError: If the token is malformed, already used, or its session is inactive or expired.
+    """
+
+    session_id, _, secret = refresh_token.partition(".")
+    if not session_id.isdigit() or not secret:
+        raise ValueError("Invalid refresh token")
+
+    new_secret = generate_refresh_token_secret()
+    user_id = await rotate_refresh_token(
+        db,
+        session_id=int(session_id),
+        old_hash=hash_refresh_token_secret(secret),
+        new_hash=hash_refresh_token_secret(new_secret),
+    )
+
+    if user_id is None:
+        raise ValueError("Invalid refresh token")
+    record_auth_event("refresh", user_id=user_id, session_id=int(session_id))
+
+    access_token = create_access_token(
+        user_id=user_id,
+        session_id=int(session_id),
+    )
 
     return {
         "access_token": access_token,
+        "refresh_token": f"{session_id}.{new_secret}",
         "token_type": "bearer",
     }
 
@@ -63,6 +209,9 @@ async def logout_user(
 ):
     """
     Logs out a user by deactivating their session.
+    The session is also dropped from the auth principal cache and added to
+    the revocation filter, so the token stops working immediately in this
+    worker; other workers learn it from their cache TTL or revocation poll.
     Args:
         db: The database session used to interact with the database.
         session_id (int): The ID of the session to be logged out.
@@ -72,8 +221,205 @@ async def logout_user(
         Exception: If the session cannot be found or if there is an issue with the database commit.
     """
 
-    session = await get_session_by_id(db, session_id)
-    if session:
-        session.is_active = False
-        await db.commit()
+    await deactivate_session(db, session_id)   # Plain UPDATE, lookups may hand out shared Session objects
+    principal_cache.invalidate(session_id)
+    revocation_filter.add(session_id)
+    record_auth_event("logout", session_id=session_id)
+
+async def list_sessions(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    current_session_id: int,
+) -> list[dict]:
+    """
+    List a user's active sessions, e.g. to show the devices logged in.
+    Args:
+        db: The database session used to interact with the database.
+        user_id (int): The user whose sessions are listed.
+        current_session_id (int): The caller's session, flagged as current.
+    Returns:
+        list[dict]: One dict per session with id, created_at, expires_at,
+            last_seen_at and current. last_seen_at trails real use by up to
+            WRITE_BEHIND_FLUSH_SECONDS.
+    """
+
+    return [
+        {
+            "id": row.id,
+            "created_at": row.created_at,
+            "expires_at": row.expires_at,
+            "last_seen_at": row.last_seen_at,
+            "current": row.id == current_session_id,
+        }
+        for row in await list_user_sessions(db, user_id)
+    ]
+
+async def logout_all_sessions(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    current_session_id: int,
+    keep_current: bool = False,
+) -> int:
+    """
+    Log a user out everywhere, e.g. after a password change or a compromise.
+    All active sessions are revoked with one UPDATE ... RETURNING, and the
+    returned ids are dropped from the auth principal cache and added to the
+    revocation filter, like logout_user does for one session. Their refresh
+    tokens stop working at once; access tokens as described in logout_user.
+    Args:
+        db: The database session used to interact with the database.
+        user_id (int): The user to log out.
+        current_session_id (int): The session the request was made with.
+        keep_current (bool): Revoke every other session but this one.
+    Returns:
+        int: The number of sessions revoked.
+    """
+
+    session_ids = await revoke_user_sessions(
+        db,
+        user_id,
+        except_session_id=current_session_id if keep_current else None,
+    )
+    for session_id in session_ids:
+        principal_cache.invalidate(session_id)
+        revocation_filter.add(session_id)
+    record_auth_event("logout_all", user_id=user_id, session_id=current_session_id)
+    return len(session_ids)
+
+async def sweep_expired_sessions(
+    db: AsyncSession,
+    *,
+    retention: timedelta,
+    batch_size: int,
+) -> int:
+    """
+    Delete sessions that expired more than `retention` ago, in bounded batches.
+    Inactive (logged out) sessions are kept until they expire too, so a
+    revoked token is still known to be revoked for its whole lifetime.
+    Args:
+        db: Database session object for executing queries.
+        retention (timedelta): How long expired sessions are kept.
+        batch_size (int): Maximum rows deleted per statement and transaction.
+    Returns:
+        int: The total number of deleted sessions.
+    """
+
+    before = datetime.now(timezone.utc) - retention
+    total = 0
+    while True:
+        deleted = await delete_expired_sessions(db, before=before, limit=batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+        await asyncio.sleep(0)  # Let requests run between batches
+
+async def maintain_session_partitions(
+    db: AsyncSession,
+    *,
+    retention: timedelta,
+) -> list[str]:
+    """
+    Create this and next month's sessions partitions and drop fully expired ones.
+    Months are UTC, like expires_at and the retention cutoff.
+    Args:
+        db: Database session object for executing queries.
+        retention (timedelta): How long expired sessions are kept.
+    Returns:
+        list[str]: The names of the dropped partitions.
+    """
+
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    next_month = (this_month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    for month in (this_month, next_month):
+        await create_session_partition(db, month=month)
+
+    cutoff = (datetime.now(timezone.utc) - retention).date()
+    dropped = []
+    for name in await list_session_partitions(db):
+        month = date(int(name[-6:-2]), int(name[-2:]), 1)
+        month_end = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if month_end <= cutoff:
+            await drop_session_partition(db, name)
+            dropped.append(name)
+    return dropped
+
+async def run_session_sweeper():
+    """
+    Periodically remove expired sessions until cancelled.
+    Started as a background task from the application lifespan. Every
+    SESSION_SWEEP_INTERVAL_SECONDS it rotates the monthly partitions, when the
+    sessions table is partitioned (migration 0002), and deletes expired
+    sessions in batches, which also clears expired rows out of
+    sessions_default. Partition maintenance runs in one worker at a time,
+    guarded by a Postgres advisory lock; the others skip it for that pass.
+    Both steps fail independently, errors are logged and retried on the next run.
+    """
+
+    retention = timedelta(hours=SESSION_RETENTION_HOURS)
+    while True:
+        try:
+            async with try_advisory_lock(SESSION_PARTITIONS_LOCK_KEY) as acquired:
+                if acquired:
+                    async with AsyncSessionLocal() as db:
+                        if await sessions_are_partitioned(db):
+                            dropped = await maintain_session_partitions(db, retention=retention)
+                            if dropped:
+                                logger.info("Dropped expired session partitions %s", dropped)
+        except Exception:     # Lock timeout, database down...: the row sweep below still runs
+            logger.exception("Session partition maintenance failed")
+
+        try:
+            async with AsyncSessionLocal() as db:
+                deleted = await sweep_expired_sessions(
+                    db,
+                    retention=retention,
+                    batch_size=SESSION_SWEEP_BATCH_SIZE,
+                )
+                if deleted:
+                    logger.info("Deleted %d expired sessions", deleted)
+        except Exception:     # Database down, DNS failure...: keep the sweeper alive and retry
+            logger.exception("Session sweep failed")
+
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+
+async def refresh_revocations(db: AsyncSession) -> int:
+    """
+    Load the sessions revoked since the last poll into the revocation filter.
+    The first poll reaches back one filter window, later ones resume from the
+    newest revoked_at seen (minus REVOCATION_POLL_OVERLAP).
+    Args:
+        db: Database session object for executing queries.
+    Returns:
+        int: The number of revoked sessions read.
+    """
+
+    if revocation_filter.watermark is None:
+        since = datetime.now(timezone.utc) - timedelta(seconds=revocation_filter.window)
+    else:
+        since = revocation_filter.watermark - REVOCATION_POLL_OVERLAP
+
+    rows = await list_revoked_sessions(db, since=since)
+    for session_id, _ in rows:
+        revocation_filter.add(session_id)
+    revocation_filter.mark_refreshed(rows[-1].revoked_at if rows else None)
+    return len(rows)
+
+async def run_revocation_refresher():
+    """
+    Keep the revocation filter current until cancelled.
+    Started as a background task from the application lifespan when
+    AUTH_STATELESS_ENABLED is set. Polls every REVOCATION_REFRESH_SECONDS;
+    errors are logged and retried, and get_current_user falls back to the
+    database once the filter is older than REVOCATION_MAX_STALENESS_SECONDS.
+    """
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await refresh_revocations(db)
+        except Exception:     # Database down, DNS failure...: keep polling
+            logger.exception("Revocation refresh failed")
 
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
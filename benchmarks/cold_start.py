@@ -0,0 +1,75 @@
+"""
+Measure cold start: process spawn to first fast responses.
+
+Starts `uvicorn main:app` and reports, in milliseconds from spawn:
+    first_response      first 200 from GET /health/app (startup complete)
+    first_db_query      first request that queries the database, and its own latency:
+                        POST /auth/refresh with an unknown token, answered 401 after
+                        one UPDATE by primary key (no password hashing). GET /health/db
+                        only returns the health prober's cached result.
+    first_login         first POST /auth/login and its own latency (with --email/--password)
+
+Run it with STARTUP_WARMUP_ENABLED=false and =true to see what the warmup buys.
+
+Usage:
+    python -m benchmarks.cold_start [--email bench@example.com --password secret]
+
+Requires httpx and a reachable database (PG_* settings).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load import free_port
+
+
+def main(args) -> dict:
+    port = free_port()
+    spawned = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=dict(os.environ, SESSION_SWEEPER_ENABLED="false"),
+    )
+    results = {"warmup_enabled": os.environ.get("STARTUP_WARMUP_ENABLED", "true")}
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - spawned) * 1000, 1)
+
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while True:
+                try:
+                    if client.get("/health/app").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)    # Not ready yet, do not spin on a non-200 answer
+            results["first_response_ms"] = elapsed_ms()
+
+            started = time.perf_counter()
+            client.post("/auth/refresh", json={"refresh_token": "0.cold-start"})
+            results["first_db_query_latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            results["first_db_query_ms"] = elapsed_ms()
+
+            if args.email:
+                started = time.perf_counter()
+                client.post("/auth/login", json={"email": args.email, "password": args.password})
+                results["first_login_latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                results["first_login_ms"] = elapsed_ms()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,59 @@
+"""
+Microbenchmark of access token signing and verification.
+
+Times core.security.create_access_token and decode_access_token (PyJWT with
+keys parsed once) for EdDSA, RS256 and HS256, next to python-jose HS256, the
+previous backend, when it is still installed. No database or server is
+needed; throwaway keys are generated in a temporary directory.
+
+Usage:
+    python -m benchmarks.jwt_codec --number 5000
+"""
+import argparse
+import tempfile
+import timeit
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import core.security as security
+
+
+def measure(label: str, encode, decode, number: int):
+    encode_us = min(timeit.repeat(encode, number=number, repeat=3)) / number * 1_000_000
+    decode_us = min(timeit.repeat(decode, number=number, repeat=3)) / number * 1_000_000
+    print(f"{label:>12}: encode={encode_us:.1f}us decode={decode_us:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as keys_dir:
+        for algorithm in ("EdDSA", "RS256", "HS256"):
+            if algorithm != "HS256":
+                Path(keys_dir, "current.pem").write_bytes(security.generate_signing_key(algorithm))
+            elif not security.JWT_SECRET_KEY:
+                security.JWT_SECRET_KEY = "benchmark-secret"
+            security._signing_keys = security.load_signing_keys(algorithm, keys_dir, "current")
+            token = security.create_access_token(user_id=1, session_id=1)
+            measure(
+                f"pyjwt {algorithm}",
+                lambda: security.create_access_token(user_id=1, session_id=1),
+                lambda: security.decode_access_token(token),
+                args.number,
+            )
+
+    try:
+        from jose import jwt as jose_jwt
+    except ImportError:
+        print(f"{'jose HS256':>12}: python-jose not installed, skipped")
+    else:
+        claims = {"sub": "1", "sid": 1, "exp": datetime.now(timezone.utc) + timedelta(minutes=15)}
+        token = jose_jwt.encode(claims, "benchmark-secret", algorithm="HS256")
+        measure(
+            "jose HS256",
+            lambda: jose_jwt.encode(claims, "benchmark-secret", algorithm="HS256"),
+            lambda: jose_jwt.decode(token, "benchmark-secret", algorithms=["HS256"]),
+            args.number,
+        )
@@ -0,0 +1,324 @@
+"""
+Load benchmark for the auth and user endpoints.
+
+Boots `main:app` with uvicorn in a subprocess (or targets --base-url), drives
+concurrent load per scenario, and writes throughput and p50/p95/p99 latency per
+endpoint to JSON. With --baseline, results are compared against a stored run
+and the process exits with 1 when a scenario regressed past the thresholds.
+
+Scenarios:
+    health_app      GET /health/app, no database
+    health_db       GET /health/db, the health prober's cached database check
+    login           POST /auth/login, bcrypt verify + session insert
+    register        POST /users, bcrypt hash + user insert (unique emails)
+    authenticated   GET /auth/sessions, a request through get_current_user
+
+Database:
+    By default the server uses the PG_* settings from .env. With --docker a
+    disposable Postgres container is started, migrated with `alembic upgrade
+    head`, and removed afterwards; unless JWT_KEYS_DIR is set, a throwaway
+    JWT signing key is generated for the run as well.
+
+Usage:
+    python -m benchmarks.load --concurrency 32 --duration 15 --output bench.json
+    python -m benchmarks.load --docker --save-baseline benchmarks/baseline.json
+    python -m benchmarks.load --docker --baseline benchmarks/baseline.json --max-regression 0.2
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+SCENARIOS = ("health_app", "health_db", "login", "register", "authenticated")
+BENCH_PASSWORD = "benchmark-password"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# Disposable Postgres and server processes below:
+# ------------------------------------------------------------------
+
+def start_postgres_container(env: dict) -> str:
+    """
+    Start a throwaway Postgres container and point env's PG_* settings at it.
+    Returns:
+        str: The container id, for removal.
+    """
+
+    port = free_port()
+    container = subprocess.check_output([
+        "docker", "run", "-d", "--rm",
+        "-e", "POSTGRES_PASSWORD=bench", "-e", "POSTGRES_DB=bench",
+        "-p", f"127.0.0.1:{port}:5432", "postgres:16",
+    ], text=True).strip()
+    env.update({
+        "PG_HOST": "127.0.0.1",
+        "PG_PORT": str(port),
+        "PG_USERNAME": "postgres",
+        "PG_PASSWORD": "bench",
+        "PG_PROJECTS_DATABASE": "bench",
+    })
+
+    deadline = time.time() + 60
+    while subprocess.run(
+        ["docker", "exec", container, "pg_isready", "-U", "postgres", "-d", "bench"],
+        capture_output=True,
+    ).returncode != 0:
+        if time.time() > deadline:
+            raise RuntimeError("Postgres container did not become ready")
+        time.sleep(0.5)
+    time.sleep(1)   # pg_isready answers before the init scripts restart the server
+
+    subprocess.check_call(["alembic", "upgrade", "head"], env=env)
+    return container
+
+def generate_jwt_key(env: dict) -> str:
+    """
+    Create a throwaway JWT signing key and point env's JWT_KEYS_DIR at it.
+    Returns:
+        str: The temporary keys directory, for removal.
+    """
+
+    keys_dir = tempfile.mkdtemp(prefix="bench-jwt-")
+    env["JWT_KEYS_DIR"] = keys_dir
+    subprocess.check_call(
+        [sys.executable, "cli.py", "generate-jwt-key", "--keys-dir", keys_dir],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    return keys_dir
+
+def start_server(env: dict, port: int, workers: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+    )
+
+async def wait_until_up(base_url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/health/app")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError(f"Server at {base_url} did not start")
+            await asyncio.sleep(0.2)
+
+
+# Load generation below:
+# ------------------------------------------------------------------
+
+async def prepare(client: httpx.AsyncClient) -> dict:
+    """
+    Register the benchmark user and log in once for the authenticated scenario.
+    """
+
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    response = await client.post("/users", json={"email": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    response = await client.post("/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return {"email": email, "token": response.json()["access_token"]}
+
+def build_request(scenario: str, context: dict) -> tuple[str, str, dict]:
+    if scenario == "health_app":
+        return "GET", "/health/app", {}
+    if scenario == "health_db":
+        return "GET", "/health/db", {}
+    if scenario == "login":
+        return "POST", "/auth/login", {"json": {"email": context["email"], "password": BENCH_PASSWORD}}
+    if scenario == "register":
+        email = f"bench-{uuid.uuid4().hex}@example.com"
+        return "POST", "/users", {"json": {"email": email, "password": BENCH_PASSWORD}}
+    if scenario == "authenticated":
+        return "GET", "/auth/sessions", {"headers": {"Authorization": f"Bearer {context['token']}"}}
+    raise ValueError(f"Unknown scenario {scenario}")
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: str,
+    context: dict,
+    *,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+) -> dict:
+    """
+    Drive one scenario with `concurrency` closed-loop clients.
+    Returns:
+        dict: requests, errors, throughput_rps and p50/p95/p99 latency in ms.
+    """
+
+    latencies: list[float] = []
+    errors = 0
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    async def worker():
+        nonlocal errors
+        while (now := time.perf_counter()) < deadline:
+            method, path, kwargs = build_request(scenario, context)
+            try:
+                response = await client.request(method, path, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if now >= measure_from:
+                latencies.append((time.perf_counter() - now) * 1000)
+                errors += failed
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    if not latencies:
+        return {"requests": 0, "errors": errors, "throughput_rps": 0.0}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+# Baseline comparison below:
+# ------------------------------------------------------------------
+
+def compare(results: dict, baseline: dict, max_regression: float, max_error_rate: float) -> list[str]:
+    """
+    Compare a run against a baseline run.
+    A scenario fails when its p95 grew, or its throughput dropped, by more
+    than max_regression (a fraction), or its error rate exceeds max_error_rate.
+    Returns:
+        list[str]: Human readable failures, empty when the run passes.
+    """
+
+    failures = []
+    for scenario, current in results["scenarios"].items():
+        if current["requests"] and current["errors"] / current["requests"] > max_error_rate:
+            failures.append(f"{scenario}: error rate {current['errors']}/{current['requests']}")
+
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous or not current["requests"]:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            failures.append(f"{scenario}: p95 {current['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - max_regression):
+            failures.append(
+                f"{scenario}: throughput {current['throughput_rps']}rps vs baseline {previous['throughput_rps']}rps"
+            )
+    return failures
+
+async def run(args) -> int:
+    env = dict(os.environ, SESSION_SWEEPER_ENABLED="false", LOG_ACCESS_SAMPLE_RATE="0", RATE_LIMIT_ENABLED="false")
+    container = server = keys_dir = None
+    base_url = args.base_url
+
+    try:
+        if not base_url:
+            if args.docker:
+                container = start_postgres_container(env)
+                if "JWT_KEYS_DIR" not in os.environ:
+                    keys_dir = generate_jwt_key(env)
+            port = free_port()
+            server = start_server(env, port, args.workers)
+            base_url = f"http://127.0.0.1:{port}"
+        await wait_until_up(base_url)
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            context = await prepare(client)
+            scenarios = {}
+            for scenario in args.scenarios:
+                scenarios[scenario] = await run_scenario(
+                    client,
+                    scenario,
+                    context,
+                    concurrency=args.concurrency,
+                    duration=args.duration,
+                    warmup=args.warmup,
+                )
+                print(f"{scenario:>14}: {json.dumps(scenarios[scenario])}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if container is not None:
+            subprocess.run(["docker", "rm", "-f", container], capture_output=True)
+        if keys_dir is not None:
+            shutil.rmtree(keys_dir, ignore_errors=True)
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count(), "python": platform.python_version()},
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "workers": args.workers,
+        },
+        "scenarios": scenarios,
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            file.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            failures = compare(results, json.load(file), args.max_regression, args.max_error_rate)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Benchmark an already running server instead of starting one")
+    parser.add_argument("--docker", action="store_true", help="Start a disposable Postgres container")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started server")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--output", help="Write results JSON here instead of stdout")
+    parser.add_argument("--save-baseline", help="Also write the results as a new baseline file")
+    parser.add_argument("--baseline", help="Compare against this baseline and exit 1 on regression")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95/throughput regression (fraction)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    sys.exit(asyncio.run(run(parser.parse_args())))
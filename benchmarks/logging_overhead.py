@@ -0,0 +1,65 @@
+"""
+Measure the cost of a log call on the request path.
+
+Compares a plain StreamHandler writing to a slow sink (simulating a blocked
+stdout pipe or disk) with the queue-based pipeline from core/logging.py.
+The direct handler pays the sink latency on every call; the queue handler
+only enqueues, so calls stay in the microsecond range.
+
+Usage:
+    python -m benchmarks.logging_overhead --calls 2000 --sink-delay-ms 1
+"""
+import argparse
+import io
+import logging
+import statistics
+import time
+
+import core.logging as app_logging
+
+
+class SlowSink(io.TextIOBase):
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        return len(text)
+
+
+def time_calls(logger: logging.Logger, calls: int) -> list[float]:
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        logger.info("login ok", extra={"user_id": i})
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+def report(label: str, samples: list[float]):
+    ordered = sorted(samples)
+    print(
+        f"{label:>14}: p50={statistics.median(ordered):.1f}us "
+        f"p99={ordered[int(len(ordered) * 0.99) - 1]:.1f}us max={ordered[-1]:.1f}us"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--sink-delay-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    sink = SlowSink(args.sink_delay_ms / 1000)
+
+    direct = logging.getLogger("bench.direct")
+    direct.propagate = False
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(app_logging.JsonFormatter())
+    direct.addHandler(handler)
+    direct.setLevel(logging.INFO)
+    report("direct handler", time_calls(direct, args.calls))
+
+    app_logging.configure_logging()
+    app_logging._listener.handlers[0].setStream(sink)
+    queued = logging.getLogger("bench.queued")
+    report("queue handler", time_calls(queued, args.calls))
+    app_logging.shutdown_logging()
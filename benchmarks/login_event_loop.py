@@ -0,0 +1,85 @@
+"""
+Measure how /auth/login load affects the latency of unrelated requests.
+
+Hammers POST /auth/login with concurrent logins while probing GET /health/app,
+then prints p50/p95/p99 of the probe. With bcrypt on the event loop the probe
+p99 climbs to the bcrypt cost; with the hashing pool it stays flat.
+
+Usage:
+    python -m benchmarks.login_event_loop --base-url http://localhost:8000 \\
+        --email bench@example.com --password secret --concurrency 32 --seconds 20
+
+The user must exist beforehand (POST /users). Start the server with
+RATE_LIMIT_ENABLED=false: the per-email login limit would otherwise answer
+most logins with 429 after the first burst, and the run would measure
+rejections instead of password checks. The run fails when any login is
+not answered with 200. Requires httpx.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def hammer_login(client: httpx.AsyncClient, args, deadline: float, counts: dict):
+    while time.perf_counter() < deadline:
+        response = await client.post(
+            "/auth/login",
+            json={"email": args.email, "password": args.password},
+        )
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+async def probe_health(client: httpx.AsyncClient, deadline: float, samples: list[float]):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get("/health/app")
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        baseline: list[float] = []
+        await probe_health(client, time.perf_counter() + 3, baseline)
+
+        samples: list[float] = []
+        counts: dict[int, int] = {}
+        deadline = time.perf_counter() + args.seconds
+        await asyncio.gather(
+            probe_health(client, deadline, samples),
+            *(hammer_login(client, args, deadline, counts) for _ in range(args.concurrency)),
+        )
+
+    for label, data in (("idle", baseline), ("under login load", samples)):
+        print(
+            f"/health/app {label:>17}: n={len(data)} "
+            f"p50={statistics.median(data):.1f}ms "
+            f"p95={percentile(data, 95):.1f}ms "
+            f"p99={percentile(data, 99):.1f}ms"
+        )
+    print(f"/auth/login status codes: {counts}")
+
+    failed = sum(count for status, count in counts.items() if status != 200)
+    if failed:
+        hint = " (429: start the server with RATE_LIMIT_ENABLED=false)" if 429 in counts else ""
+        print(f"{failed} logins were not answered with 200, the latencies above are not comparable{hint}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20)
+    sys.exit(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,75 @@
+"""
+Microbenchmark of the per-response serialization cost on hot routes.
+
+Compares FastAPI's default path (response_model validation from ORM
+attributes, model serialization, JSONResponse rendering) with the
+FAST_JSON_RESPONSES path (trusted dump helpers rendered by orjson) for the
+payloads of POST /users, GET /users and POST /auth/login. No database or
+server is needed.
+
+Usage:
+    python -m benchmarks.serialization --number 20000
+"""
+import argparse
+import timeit
+
+from fastapi._compat import ModelField
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+
+from auth.schemas import TokenResponse
+from core.responses import FastJSONResponse
+from users.models import User
+from users.schemas import UserPage, UserRead
+
+
+def default_path(field: ModelField, content) -> bytes:
+    # What fastapi.routing.serialize_response + JSONResponse do for a response_model route
+    value, errors = field.validate(content, {}, loc=("response",))
+    assert not errors
+    return JSONResponse(field.serialize(value)).body
+
+def measure(label: str, default, fast, number: int):
+    default_us = min(timeit.repeat(default, number=number, repeat=3)) / number * 1_000_000
+    fast_us = min(timeit.repeat(fast, number=number, repeat=3)) / number * 1_000_000
+    print(f"{label:>12}: default={default_us:.2f}us fast={fast_us:.2f}us saved={1 - fast_us / default_us:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    user = User(id=1, email="someone@example.com", hashed_password="x", is_active=True)
+    page = {
+        "items": [User(id=i, email=f"user{i}@example.com", hashed_password="x", is_active=True) for i in range(args.page_size)],
+        "next_cursor": args.page_size,
+    }
+    tokens = {"access_token": "a" * 180, "refresh_token": "1." + "r" * 43, "token_type": "bearer"}
+
+    user_field = create_model_field(name="response", type_=UserRead, mode="serialization")
+    page_field = create_model_field(name="response", type_=UserPage, mode="serialization")
+    token_field = create_model_field(name="response", type_=TokenResponse, mode="serialization")
+
+    measure(
+        "POST /users",
+        lambda: default_path(user_field, user),
+        lambda: FastJSONResponse(UserRead.dump_trusted(user)).body,
+        args.number,
+    )
+    measure(
+        f"GET /users[{args.page_size}]",
+        lambda: default_path(page_field, page),
+        lambda: FastJSONResponse({
+            "items": [UserRead.dump_trusted(item) for item in page["items"]],
+            "next_cursor": page["next_cursor"],
+        }).body,
+        max(1, args.number // args.page_size),
+    )
+    measure(
+        "/auth/login",
+        lambda: default_path(token_field, tokens),
+        lambda: FastJSONResponse(tokens).body,
+        args.number,
+    )
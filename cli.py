@@ -0,0 +1,152 @@
+"""
+Command line entry points for maintenance tasks.
+
+Usage:
+    python cli.py import-users users.ndjson [--chunk-size 1000]
+    python cli.py calibrate-hashing [--scheme bcrypt] [--target-ms 250]
+    python cli.py generate-jwt-key [--algorithm EdDSA] [--kid 20261018] [--keys-dir keys]
+    python cli.py set-admin admin@example.com [--revoke]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator
+
+from core.database import AsyncSessionLocal, engine
+from core.security import (
+    PASSWORD_HASH_SCHEMES,
+    calibrate_password_hashing,
+    generate_signing_key,
+    shutdown_password_hasher,
+)
+from settings import (
+    BULK_IMPORT_CHUNK_SIZE,
+    JWT_ALGORITHM,
+    JWT_KEYS_DIR,
+    PASSWORD_HASH_SCHEME,
+    PASSWORD_HASH_TARGET_MS,
+)
+from users.repositories import set_user_admin
+from users.services import bulk_register_users
+
+
+async def _read_lines(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        for line in file:
+            if line.strip():
+                yield line.strip()
+
+async def import_users(args) -> int:
+    """
+    Bulk import users from an NDJSON file, printing one result per line to stdout.
+    Returns:
+        int: Process exit code, 1 if any row failed.
+    """
+
+    counts: dict[str, int] = {}
+    try:
+        async with AsyncSessionLocal() as db:
+            async for result in bulk_register_users(db, _read_lines(args.path), chunk_size=args.chunk_size):
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                print(json.dumps(result))
+    finally:
+        shutdown_password_hasher()
+        await engine.dispose()
+
+    print(json.dumps(counts), file=sys.stderr)
+    return 1 if counts.get("failed") else 0
+
+async def set_admin(args) -> int:
+    """
+    Grant (or with --revoke, take away) admin rights of a user.
+    Workers still serving a cached principal pick the change up within AUTH_CACHE_TTL_SECONDS.
+    Returns:
+        int: Process exit code, 1 if no user has the email.
+    """
+
+    try:
+        async with AsyncSessionLocal() as db:
+            updated = await set_user_admin(db, args.email, not args.revoke)
+    finally:
+        await engine.dispose()
+
+    if not updated:
+        print(f"No user with email {args.email!r}", file=sys.stderr)
+        return 1
+    return 0
+
+def calibrate_hashing(args) -> int:
+    """
+    Print the hashing settings that meet the target budget on this machine, in .env format.
+    Returns:
+        int: Process exit code.
+    """
+
+    chosen, elapsed_ms = calibrate_password_hashing(args.scheme, args.target_ms, samples=args.samples)
+    for name, value in chosen.items():
+        print(f"{name}={value}")
+    print(f"# {elapsed_ms:.1f} ms per hash, target {args.target_ms:g} ms", file=sys.stderr)
+    if elapsed_ms > args.target_ms:
+        print("# the minimum cost already exceeds the target, not going lower", file=sys.stderr)
+    return 0
+
+def generate_jwt_key(args) -> int:
+    """
+    Write a new JWT private key to <keys-dir>/<kid>.pem and print its kid.
+    Returns:
+        int: Process exit code, 1 if the kid is taken.
+    """
+
+    path = Path(args.keys_dir) / f"{args.kid}.pem"
+    if path.exists() or path.with_suffix(".pub.pem").exists():
+        print(f"Key {args.kid!r} already exists in {args.keys_dir}", file=sys.stderr)
+        return 1
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as file:
+        file.write(generate_signing_key(args.algorithm))
+    print(args.kid)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="starter-fastapi-project maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-users", help="Bulk import users from an NDJSON file")
+    import_parser.add_argument("path", help='File with one {"email": ..., "password": ...} object per line')
+    import_parser.add_argument("--chunk-size", type=int, default=BULK_IMPORT_CHUNK_SIZE)
+
+    calibrate_parser = commands.add_parser("calibrate-hashing", help="Pick the password hashing cost for a latency budget")
+    calibrate_parser.add_argument("--scheme", choices=PASSWORD_HASH_SCHEMES, default=PASSWORD_HASH_SCHEME)
+    calibrate_parser.add_argument("--target-ms", type=float, default=PASSWORD_HASH_TARGET_MS, help="Budget for one hash")
+    calibrate_parser.add_argument("--samples", type=int, default=3, help="Hashes timed per candidate cost")
+
+    key_parser = commands.add_parser("generate-jwt-key", help="Create a JWT signing key for rotation")
+    key_parser.add_argument("--algorithm", choices=("EdDSA", "RS256"), default=JWT_ALGORITHM if JWT_ALGORITHM != "HS256" else "EdDSA")
+    key_parser.add_argument("--kid", default=datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S"), help="Key id, sorts after older keys by default")
+    key_parser.add_argument("--keys-dir", default=JWT_KEYS_DIR)
+
+    admin_parser = commands.add_parser("set-admin", help="Grant admin rights to a user")
+    admin_parser.add_argument("email")
+    admin_parser.add_argument("--revoke", action="store_true", help="Take admin rights away instead")
+
+    args = parser.parse_args()
+    if args.command == "import-users":
+        return asyncio.run(import_users(args))
+    if args.command == "calibrate-hashing":
+        return calibrate_hashing(args)
+    if args.command == "generate-jwt-key":
+        return generate_jwt_key(args)
+    if args.command == "set-admin":
+        return asyncio.run(set_admin(args))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
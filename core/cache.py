@@ -0,0 +1,164 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable
+
+from settings import AUTH_CACHE_MAX_SIZE, AUTH_CACHE_TTL_SECONDS
+from core.metrics import CallbackGauge
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry expiry and LRU eviction.
+    Entries expire after `ttl` seconds, or earlier when an absolute
+    `expires_at` is given on set. When the cache is full the least recently
+    used entry is evicted. The cache lives in one worker process only, so
+    invalidations do not reach other workers; the TTL bounds that staleness.
+    A value read before an invalidation must not be stored after it: callers
+    take generation() before loading and pass it to set(), which drops the
+    value if any invalidation happened meanwhile. Invalidations are rare
+    (logouts), so one counter for the whole cache costs only a few refills.
+    Not thread safe, meant to be used from the event loop.
+    Attributes:
+        maxsize (int): Maximum number of entries kept.
+        ttl (float): Default time to live of an entry in seconds.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that found nothing or an expired entry.
+        evictions (int): Entries dropped because the cache was full.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._generation = 0        # Bumped by every invalidation
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Return the cached value for key, or None if missing or expired.
+        """
+
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        deadline, value = entry
+        if deadline <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self) -> int:
+        """
+        Return a token to pass to set() for a value about to be loaded.
+        """
+
+        return self._generation
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        *,
+        expires_at: datetime | None = None,
+        generation: int | None = None,
+    ) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+        Args:
+            key: The cache key.
+            value: The value to cache.
+            expires_at (datetime | None): Absolute expiry that caps the default TTL,
+                e.g. a session's expires_at. Naive datetimes are treated as UTC.
+            generation (int | None): generation() taken before the value was
+                loaded; the value is dropped if the cache was invalidated since.
+        """
+
+        if generation is not None and generation != self._generation:
+            return
+
+        ttl = self.ttl
+        if expires_at is not None:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            ttl = min(ttl, (expires_at - datetime.now(timezone.utc)).total_seconds())
+        if ttl <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop a single entry if present.
+        """
+
+        self._generation += 1
+        self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Drop every entry whose value matches predicate, e.g. all of one user's sessions.
+        This scans the whole cache, so keep it off hot paths.
+        Returns:
+            int: The number of entries dropped.
+        """
+
+        self._generation += 1
+        keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Return the counters and current size of the cache.
+        """
+
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Cache used by core.dependencies.get_current_user
+# principal_cache: session id -> auth.models.Principal
+principal_cache = TTLCache(maxsize=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+_auth_caches = {"principal": principal_cache}
+
+CallbackGauge(
+    "auth_cache_entries",
+    "Entries currently held by the auth caches.",
+    ("cache",),
+    lambda: [((name,), cache.stats()["size"]) for name, cache in _auth_caches.items()],
+)
+CallbackGauge(
+    "auth_cache_events_total",
+    "Auth cache hits, misses and evictions.",
+    ("cache", "event"),
+    lambda: [
+        ((name, event), cache.stats()[event])
+        for name, cache in _auth_caches.items()
+        for event in ("hits", "misses", "evictions")
+    ],
+    type="counter",
+)
@@ -1,18 +1,86 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+from sqlalchemy import event, exc, func, select
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
 )
-from settings import PG_PROJECTS_URL
+from settings import (
+    PG_PROJECTS_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+    PG_REPLICA_URLS,
+    REPLICA_EJECT_SECONDS,
+    DB_SLOW_QUERY_SECONDS,
+)
+from core.metrics import CallbackGauge, Counter, Histogram
+from core.profiling import record_timing
 
+slow_query_logger = logging.getLogger("app.slow_query")
 
-# Creates engine
-engine = create_async_engine(
-    url=PG_PROJECTS_URL,
-    echo=False, # To Reduce the logs, Used for debugging purpose
-    future=True,
-)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long callers wait to acquire a connection.
+    Attributes:
+        waits (int): Number of connection acquisitions.
+        wait_seconds_total (float): Sum of acquisition wait times.
+        wait_seconds_max (float): Longest acquisition wait seen.
+        timeouts (int): Acquisitions that gave up after the pool timeout.
+    """
+
+    waits: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    timeouts: int = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            InstrumentedPool.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            InstrumentedPool.waits += 1
+            InstrumentedPool.wait_seconds_total += waited
+            InstrumentedPool.wait_seconds_max = max(InstrumentedPool.wait_seconds_max, waited)
+            record_timing("db_pool_wait", waited)
+
+# Pool log messages go to a logger named after this subclass, outside the "sqlalchemy"
+# hierarchy SQLAlchemy keeps at WARNING; match that so dispose/recreate stay quiet.
+logging.getLogger(f"{__name__}.{InstrumentedPool.__name__}").setLevel(logging.WARNING)
+
+
+def _create_engine(url: str, **kwargs):
+    return create_async_engine(
+        url=make_url(url).update_query_dict(
+            {"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)}
+        ),
+        echo=False, # To Reduce the logs, Used for debugging purpose
+        future=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        **kwargs,
+    )
+
+# Creates engine (primary, used for all writes)
+engine = _create_engine(PG_PROJECTS_URL, poolclass=InstrumentedPool)
 
 # Creates session
 AsyncSessionLocal = async_sessionmaker(
@@ -28,8 +96,288 @@ async def get_db():
         yield session
 
 
+async def prewarm_pool(
+    connections: int,
+    warmup: Callable[[AsyncSession], Awaitable[None]] | None = None,
+) -> int:
+    """
+    Open pool connections before the first request needs them.
+    The connections are checked out concurrently, so the pool really opens
+    that many, then returned to the pool as idle connections. `warmup` runs
+    on each one, eg. to execute the hot queries once so SQLAlchemy's compiled
+    cache and asyncpg's per-connection prepared statements are populated.
+    Args:
+        connections (int): Number of connections to open, capped at DB_POOL_SIZE
+            since overflow connections are closed on return.
+        warmup: Optional coroutine function called with a session bound to each connection.
+    Returns:
+        int: The number of connections opened.
+    """
+
+    connections = min(connections, DB_POOL_SIZE)
+
+    async def open_connection():
+        async with AsyncSessionLocal() as db:
+            await db.connection()
+            if warmup is not None:
+                await warmup(db)
+            await db.rollback()
+
+    await asyncio.gather(*(open_connection() for _ in range(connections)))
+    return connections
+
+@asynccontextmanager
+async def try_advisory_lock(key: int) -> AsyncIterator[bool]:
+    """
+    Try to take a Postgres session-level advisory lock, without waiting.
+    The lock is held on a dedicated pooled connection for the duration of
+    the block, so the work inside may commit as often as it likes on other
+    connections. A connection lost meanwhile releases the lock server side.
+    Args:
+        key (int): The lock id, shared by every worker doing the same job.
+    Yields:
+        bool: True if this caller holds the lock, False if another one does.
+    """
+
+    async with engine.connect() as conn:
+        acquired = await conn.scalar(select(func.pg_try_advisory_lock(key)))
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.scalar(select(func.pg_advisory_unlock(key)))
+
+def get_pool_stats() -> dict:
+    """
+    Return a snapshot of the connection pool of this worker process.
+    Returns:
+        dict: A dictionary containing:
+            - size (int): Configured persistent pool size.
+            - checked_out (int): Connections currently in use.
+            - idle (int): Open connections waiting in the pool.
+            - overflow (int): Connections opened beyond pool size (negative while the pool is filling up).
+            - max_overflow (int): Configured overflow limit.
+            - waits (int): Total connection acquisitions.
+            - wait_seconds_total (float): Total time spent acquiring connections.
+            - wait_seconds_max (float): Longest single acquisition wait.
+            - timeouts (int): Acquisitions that hit the pool timeout.
+    """
+
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "waits": InstrumentedPool.waits,
+        "wait_seconds_total": InstrumentedPool.wait_seconds_total,
+        "wait_seconds_max": InstrumentedPool.wait_seconds_max,
+        "timeouts": InstrumentedPool.timeouts,
+    }
+
+
+# Query and pool metrics below:
+# ------------------------------------------------------------------
+
+db_query_duration_seconds = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time by statement type.",
+    ("operation",),
+)
+db_query_errors_total = Counter(
+    "db_query_errors_total",
+    "Database statements that raised an error.",
+)
+db_slow_queries_total = Counter(
+    "db_slow_queries_total",
+    "Database statements slower than DB_SLOW_QUERY_SECONDS by statement type.",
+    ("operation",),
+)
+
+def _parameters_shape(parameters, executemany: bool) -> str:
+    """
+    Describe bound parameters by type only, never by value, for the slow query log.
+    Runs of one type are collapsed, so an expanded IN list of 500 ids reads
+    "(int*500)" instead of listing every element.
+    """
+
+    if executemany:
+        rows = len(parameters)
+        return f"{rows} x {_parameters_shape(parameters[0], False)}" if rows else "0 rows"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+
+    runs: list[list] = []
+    for value in parameters or ():
+        name = type(value).__name__
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    return "(" + ", ".join(name if count == 1 else f"{name}*{count}" for name, count in runs) + ")"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    db_query_duration_seconds.observe(duration, operation)
+    record_timing("db", duration)
+    if DB_SLOW_QUERY_SECONDS and duration >= DB_SLOW_QUERY_SECONDS:
+        db_slow_queries_total.inc(operation)
+        slow_query_logger.warning(
+            "Slow query: %s took %.1f ms",
+            operation,
+            duration * 1000,
+            extra={
+                "duration_ms": round(duration * 1000, 3),
+                "statement": " ".join(statement.split())[:2000],
+                "parameters": _parameters_shape(parameters, executemany),
+                "database": conn.engine.url.host,
+            },
+        )
+
+def _handle_error(context):
+    db_query_errors_total.inc()
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+def instrument_engine(async_engine) -> None:
+    """
+    Attach the query metrics, request profiling and slow query log listeners to an engine.
+    """
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(async_engine.sync_engine, "handle_error", _handle_error)
+
+instrument_engine(engine)
+
+CallbackGauge(
+    "db_pool_connections",
+    "Connections of this worker's pool by state.",
+    ("state",),
+    lambda: [((state,), get_pool_stats()[state]) for state in ("size", "checked_out", "idle", "overflow")],
+)
+CallbackGauge(
+    "db_pool_acquire_wait_seconds_total",
+    "Total time spent waiting to acquire a pooled connection.",
+    (),
+    lambda: [((), InstrumentedPool.wait_seconds_total)],
+    type="counter",
+)
+CallbackGauge(
+    "db_pool_acquire_total",
+    "Pooled connection acquisitions.",
+    (),
+    lambda: [((), InstrumentedPool.waits)],
+    type="counter",
+)
+CallbackGauge(
+    "db_pool_acquire_timeouts_total",
+    "Connection acquisitions that hit the pool timeout.",
+    (),
+    lambda: [((), InstrumentedPool.timeouts)],
+    type="counter",
+)
+
+
+# Read replicas below:
+# Read-only endpoints take their session from get_read_db, which spreads them
+# round-robin over PG_REPLICA_URLS. A replica that fails to connect or drops
+# its connection is ejected for REPLICA_EJECT_SECONDS. Without replicas, or when
+# all are ejected, reads go to the primary.
+# ------------------------------------------------------------------
+
+db_replica_ejections_total = Counter(
+    "db_replica_ejections_total",
+    "Times a read replica was taken out of rotation after a connection error.",
+    ("replica",),
+)
+
+
+class Replica:
+    """
+    One read replica: its engine, session factory and ejection deadline.
+    """
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = _create_engine(url)
+        self.sessionmaker = async_sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            info={"replica": name},
+        )
+        self.ejected_until = 0.0
+        instrument_engine(self.engine)
+        event.listen(self.engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect or isinstance(context.original_exception, OSError):
+            self.eject()
+
+    def eject(self) -> None:
+        if self.ejected_until <= time.monotonic():
+            db_replica_ejections_total.inc(self.name)
+        self.ejected_until = time.monotonic() + REPLICA_EJECT_SECONDS
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+
+replicas: list[Replica] = [
+    Replica(f"replica{index}", url) for index, url in enumerate(PG_REPLICA_URLS)
+]
+_next_replica = 0
+
+def pick_replica() -> Replica | None:
+    """
+    Return the next healthy replica round-robin, or None to read from the primary.
+    """
+
+    global _next_replica
+    for _ in range(len(replicas)):
+        replica = replicas[_next_replica % len(replicas)]
+        _next_replica += 1
+        if replica.healthy:
+            return replica
+    return None
+
+# Like get_db, but for endpoints that only read; may return a replica session.
+# Replica sessions carry session.info["replica"], replicas can lag the primary.
+async def get_read_db():
+    replica = pick_replica()
+    if replica is None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    async with replica.sessionmaker() as session:
+        try:
+            yield session
+        except (OSError, exc.DBAPIError) as error:
+            if isinstance(error, OSError) or error.connection_invalidated:
+                replica.eject()
+            raise
+
+def is_replica_session(session: AsyncSession) -> bool:
+    return "replica" in session.info
+
+CallbackGauge(
+    "db_replica_healthy",
+    "1 while a read replica is in rotation, 0 while ejected.",
+    ("replica",),
+    lambda: [((replica.name,), int(replica.healthy)) for replica in replicas],
+)
+
+
 # Registers db models in Base.metadata
 # Stores table name, column definitions, constraints
 class Base(DeclarativeBase):
     __abstract__ = True
-    __table_args__ = {"schema": "starter-fastapi-project"}
\ No newline at end of file
+    __table_args__ = {"schema": "starter-fastapi-project"}
@@ -3,10 +3,14 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
 
-from core.database import get_db
+from core.database import get_db, get_read_db, is_replica_session
+from core.cache import principal_cache
+from core.revocation import revocation_filter
 from core.security import decode_access_token
-from auth.repositories import get_session_by_id
-from users.repositories import get_user_by_id
+from auth.models import Principal
+from auth.repositories import get_principal
+from auth.services import record_session_activity
+from settings import AUTH_STATELESS_ENABLED, REPLICA_READ_YOUR_WRITES_SECONDS
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -14,21 +18,33 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
-):
+    read_db: AsyncSession = Depends(get_read_db),
+) -> Principal:
     """
     Retrieve the current user based on the provided OAuth2 token.
-    This asynchronous function extracts the user information from the token,
-    validates the session associated with the user, and returns the user object.
+    This asynchronous function extracts the session id from the token,
+    resolves the session and its user with a single joined query, and
+    returns the caller as a lightweight Principal.
+    With AUTH_STATELESS_ENABLED the signed claims are trusted and only the
+    in-memory revocation filter is checked, so no request reads the
+    database; while the filter is stale the database path below is used.
+    Principals are served from the in-process auth cache when possible, so
+    hot tokens are authorized without touching the database.
+    Misses are read from a replica, except for tokens issued within the last
+    REPLICA_READ_YOUR_WRITES_SECONDS, whose session row may not have replicated
+    yet; a row missing on a replica is looked up again on the primary.
     Parameters:
         token (str): The OAuth2 token used for authentication, automatically
                      provided by the FastAPI dependency injection system.
-        db (AsyncSession): The database session, automatically provided by
+        db (AsyncSession): The primary database session, automatically provided by
                            the FastAPI dependency injection system.
+        read_db (AsyncSession): The read database session, a replica when configured.
     Returns:
-        User: The user object corresponding to the authenticated user.
+        Principal: The authenticated caller (user id, email and session).
     Raises:
-        HTTPException: If the token is invalid (401) or if the session is
-                       expired or inactive (401).
+        HTTPException: If the token is invalid (401), if the session is
+                       expired or inactive (401), or if the user account
+                       was deactivated (401).
     """
     
     payload = decode_access_token(token)
@@ -37,13 +53,80 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="Invalid token")
 
     session_id = payload.get("sid")
-    user_id = int(payload.get("sub"))
 
-    session = await get_session_by_id(db, session_id)
+    if AUTH_STATELESS_ENABLED and revocation_filter.is_fresh():
+        if revocation_filter.is_revoked(session_id):
+            raise HTTPException(status_code=401, detail="Session expired")
+        record_session_activity(session_id)
+        return Principal(
+            id=int(payload.get("sub")),
+            email=None,
+            is_active=True,     # Deactivating a user revokes all of its sessions
+            is_admin=None,      # Not in the token, require_admin checks the database
+            session_id=session_id,
+            session_active=True,
+            expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc),
+        )
 
-    if not session or not session.is_active or session.expires_at < datetime.now(timezone.utc):
-    # if not session or not session.is_active or session.expires_at < datetime.utcnow():
+    # Read your writes: a fresh login's session may still be replicating.
+    issued_at = payload.get("iat", 0)
+    if datetime.now(timezone.utc).timestamp() - issued_at < REPLICA_READ_YOUR_WRITES_SECONDS:
+        read_db = db
+
+    principal = principal_cache.get(session_id)
+    if principal is None:
+        generation = principal_cache.generation()   # A logout while we read must win
+        principal = await get_principal(read_db, session_id)
+        if principal is None and is_replica_session(read_db):
+            principal = await get_principal(db, session_id)
+        if principal:
+            principal_cache.set(session_id, principal, expires_at=principal.expires_at, generation=generation)
+
+    # Sessions revoked in this worker, whatever a lagging replica or an older read says
+    if revocation_filter.is_revoked(session_id):
+        raise HTTPException(status_code=401, detail="Session expired")
+
+    if (
+        not principal
+        or principal.id != int(payload.get("sub"))
+        or not principal.session_active
+        or principal.expires_at < datetime.now(timezone.utc)
+    ):
         raise HTTPException(status_code=401, detail="Session expired")
 
-    user = await get_user_by_id(db, int(user_id))
-    return user
+    if not principal.is_active:
+        raise HTTPException(status_code=401, detail="User is inactive")
+
+    record_session_activity(session_id)     # Written behind, no UPDATE per request
+    return principal
+
+
+async def require_admin(
+    principal: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """
+    Allow only admins, for routes that expose or create other users' accounts.
+    Principals resolved from the database carry the admin flag already. A
+    token validated statelessly does not, so its session is resolved on the
+    primary instead; admin routes are rare enough to afford the query, and
+    a revoked admin flag is never trusted from a token.
+    Parameters:
+        principal (Principal): The authenticated caller.
+        db (AsyncSession): The primary database session.
+    Returns:
+        Principal: The caller, when it is an admin.
+    Raises:
+        HTTPException: 403 if the caller is not an admin, 401 if its session
+                       turns out to be gone when it is checked.
+    """
+
+    if principal.is_admin is None:
+        resolved = await get_principal(db, principal.session_id)
+        if resolved is None or not resolved.session_active or not resolved.is_active:
+            raise HTTPException(status_code=401, detail="Session expired")
+        principal = resolved
+
+    if not principal.is_admin:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return principal
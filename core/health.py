@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from settings import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    HEALTH_PROBE_INTERVAL_SECONDS,
+    HEALTH_DB_TIMEOUT_SECONDS,
+    HEALTH_MAX_LOOP_LAG_SECONDS,
+    HEALTH_MAX_POOL_SATURATION,
+)
+from core.database import engine, get_pool_stats
+from core.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+event_loop_lag_seconds = Gauge(
+    "event_loop_lag_seconds",
+    "How late the health prober's sleep woke up, i.e. how long the event loop was blocked.",
+)
+db_probe_latency_seconds = Gauge(
+    "db_probe_latency_seconds",
+    "Latency of the health prober's SELECT 1, including the pool checkout.",
+)
+app_ready = Gauge(
+    "app_ready",
+    "1 while the readiness check passes, else 0.",
+)
+
+
+class HealthProber:
+    """
+    Probes the database, the pool and the event loop from one background task.
+    Readiness endpoints return the last snapshot instead of probing per
+    request, so any number of orchestrator and load balancer probes cost one
+    pooled SELECT 1 per HEALTH_PROBE_INTERVAL_SECONDS, and a probe still
+    answers (with 503) when the pool is exhausted.
+    Attributes:
+        snapshot (dict): The last probe result, see probe().
+        probed_at (float | None): time.monotonic() of the last probe.
+    """
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.loop_lag = 0.0
+        self.probed_at: float | None = None
+        self.snapshot: dict = {"ready": False, "reason": "starting"}
+
+    async def probe_db(self) -> tuple[bool, float, str | None]:
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(HEALTH_DB_TIMEOUT_SECONDS):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as exc:     # Timeout, pool timeout, connection refused...
+            return False, time.perf_counter() - started, type(exc).__name__   # No hosts or DSNs in a public endpoint
+        return True, time.perf_counter() - started, None
+
+    async def probe(self) -> dict:
+        """
+        Run one probe and store it as the snapshot.
+        Returns:
+            dict: ready (bool), reason (str | None, why not ready), checked_at,
+                db {ok, latency_ms, error}, pool {checked_out, capacity, saturation},
+                and loop {lag_ms}.
+        """
+
+        db_ok, db_latency, db_error = await self.probe_db()
+        pool = get_pool_stats()
+        capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+        saturation = pool["checked_out"] / capacity if capacity else 0.0
+
+        reason = None
+        if not db_ok:
+            reason = "database unreachable"
+        elif saturation >= HEALTH_MAX_POOL_SATURATION:
+            reason = "connection pool saturated"
+        elif self.loop_lag > HEALTH_MAX_LOOP_LAG_SECONDS:
+            reason = "event loop lagging"
+
+        self.snapshot = {
+            "ready": reason is None,
+            "reason": reason,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "db": {"ok": db_ok, "latency_ms": round(db_latency * 1000, 3), "error": db_error},
+            "pool": {"checked_out": pool["checked_out"], "capacity": capacity, "saturation": round(saturation, 3)},
+            "loop": {"lag_ms": round(self.loop_lag * 1000, 3)},
+        }
+        self.probed_at = time.monotonic()
+        db_probe_latency_seconds.set(value=db_latency)
+        app_ready.set(value=int(reason is None))
+        return self.snapshot
+
+    def current(self) -> dict:
+        """
+        Return the last snapshot, marked not ready when the prober stopped
+        updating it (e.g. its task died or the loop is blocked).
+        """
+
+        if self.probed_at is not None and time.monotonic() - self.probed_at > 3 * self.interval + HEALTH_DB_TIMEOUT_SECONDS:
+            return {**self.snapshot, "ready": False, "reason": "health probe stale"}
+        return self.snapshot
+
+    async def run(self):
+        """
+        Probe every interval until cancelled. The sleep between probes doubles
+        as the event loop lag measurement: any delay beyond the interval is
+        time the loop spent blocked.
+        """
+
+        while True:
+            try:
+                await self.probe()
+            except Exception:
+                logger.exception("Health probe failed")
+
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.loop_lag = max(0.0, time.monotonic() - started - self.interval)
+            event_loop_lag_seconds.set(value=self.loop_lag)
+
+
+health_prober = HealthProber()
@@ -0,0 +1,170 @@
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import Counter
+from settings import LOG_LEVEL, LOG_QUEUE_SIZE, LOG_ACCESS_SAMPLE_RATE
+
+
+# Request id of the request being handled by the current task, "-" outside requests.
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+access_logger = logging.getLogger("app.access")
+
+log_records_dropped_total = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the logging queue was full.",
+)
+
+# Attributes every LogRecord has; anything else was passed with extra={...}.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id", "color_message"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format log records as one JSON object per line.
+    Fields passed with `extra={...}` are added as top level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller.
+    The record is stamped with the current request id and its message and
+    traceback are rendered in the calling task, where the context is still
+    available; the JSON encoding and the actual I/O happen on the listener
+    thread. When the bounded queue is full the record is dropped and counted.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped_total.inc()
+
+
+_listener: QueueListener | None = None
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through a bounded queue drained by a background thread.
+    Replaces the handlers of the root and uvicorn loggers, so every log call
+    on the event loop only enqueues a record. uvicorn's own access log is
+    disabled in favour of RequestContextMiddleware. Safe to call more than once.
+    """
+
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _listener = QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [NonBlockingQueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    for name in ("uvicorn", "uvicorn.error"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    logging.getLogger("uvicorn.access").disabled = True
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the listener thread. Call it on shutdown.
+    """
+
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware that assigns a request id and writes sampled access logs.
+    The id is taken from the X-Request-ID header or generated, stored in
+    request_id_var for every log record of the request, and echoed back in
+    the response. Access logs are written for every 5xx response and for a
+    LOG_ACCESS_SAMPLE_RATE share of the others.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if status_code >= 500 or random.random() < LOG_ACCESS_SAMPLE_RATE:
+                access_logger.info(
+                    "%s %s %d",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    extra={
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                        "status": status_code,
+                        "sample_rate": 1.0 if status_code >= 500 else LOG_ACCESS_SAMPLE_RATE,
+                    },
+                )
+            request_id_var.reset(token)
@@ -0,0 +1,204 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow bcrypt rounds.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames: tuple[str, ...], labelvalues: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by label values.
+    Attributes:
+        name (str): Metric name in the Prometheus exposition.
+        help (str): One line description.
+        labelnames (tuple[str, ...]): Label names, values are passed positionally to inc().
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        _registry.append(self)
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}"
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down, eg. requests in flight.
+    """
+
+    type = "gauge"
+
+    def dec(self, *labelvalues, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues, value: float) -> None:
+        self._values[labelvalues] = value
+
+
+class CallbackGauge:
+    """
+    Gauge whose samples are read from a callback at scrape time.
+    Used to export stats that other modules already keep (pool, caches),
+    so nothing extra happens on the request path.
+    Attributes:
+        callback: Returns (labelvalues, value) pairs when called.
+        type (str): "gauge", or "counter" when the callback reads running totals.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...],
+        callback: Callable[[], Iterable[tuple[tuple, float]]],
+        type: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.callback = callback
+        self.type = type
+        _registry.append(self)
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, value in self.callback():
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}"
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets.
+    observe() is one bisect and two additions, cheap enough for every request.
+    Attributes:
+        buckets (tuple[float, ...]): Upper bounds of the buckets, ascending.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}     # labelvalues -> [bucket counts..., sum, count]
+        _registry.append(self)
+
+    def observe(self, value: float, *labelvalues) -> None:
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labelvalues)} {series[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labelvalues)} {series[-1]}"
+
+
+def render_metrics() -> str:
+    """
+    Render every registered metric in the Prometheus text format (version 0.0.4).
+    Returns:
+        str: The exposition body for GET /metrics.
+    """
+
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP request metrics below:
+# ------------------------------------------------------------------
+
+http_requests_total = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ("method", "route"),
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served.",
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count, latency and in-flight requests.
+    Routes are labelled by their template (eg. /users/export), never the raw
+    path, so label cardinality stays bounded. Written as plain ASGI instead of
+    BaseHTTPMiddleware to avoid the extra task and body copying per request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            http_request_duration_seconds.observe(time.perf_counter() - started, scope["method"], route_path)
+            http_requests_total.inc(scope["method"], route_path, status_code)
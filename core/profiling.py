@@ -0,0 +1,194 @@
+import cProfile
+import hmac
+import io
+import logging
+import pstats
+import random
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import Counter
+from settings import PROFILING_TOKEN, PROFILING_SAMPLE_RATE, PROFILING_TOP_FUNCTIONS
+
+
+profile_logger = logging.getLogger("app.profile")
+
+requests_profiled_total = Counter(
+    "requests_profiled_total",
+    "Requests profiled, by trigger (header, sampled).",
+    ("trigger",),
+)
+
+
+class RequestProfile:
+    """
+    Time spent by one request in the database, crypto and serialization.
+    Filled by record_timing() from the code doing the work, which finds the
+    profile of its request through a context variable.
+    Attributes:
+        timings (dict[str, float]): Seconds per category.
+        counts (dict[str, int]): Timed operations per category, e.g. queries.
+        profiler (cProfile.Profile | None): Function level profile, when captured.
+    """
+
+    __slots__ = ("timings", "counts", "profiler")
+
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.profiler: cProfile.Profile | None = None
+
+    def add(self, category: str, seconds: float) -> None:
+        self.timings[category] = self.timings.get(category, 0.0) + seconds
+        self.counts[category] = self.counts.get(category, 0) + 1
+
+    def breakdown(self, total: float) -> dict:
+        breakdown = {f"{category}_ms": round(seconds * 1000, 3) for category, seconds in self.timings.items()}
+        breakdown.update({f"{category}_count": count for category, count in self.counts.items()})
+        breakdown["other_ms"] = round((total - sum(self.timings.values())) * 1000, 3)
+        return breakdown
+
+    def server_timing(self, total: float) -> bytes:
+        entries = [
+            f'{category};dur={seconds * 1000:.3f};desc="{self.counts[category]}x"'
+            for category, seconds in self.timings.items()
+        ]
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(entries).encode("latin-1")
+
+
+# Profile of the request handled by the current task, None when it is not profiled.
+_profile_var: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+_NOT_PROFILED = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("profile", "category", "started")
+
+    def __init__(self, profile: RequestProfile, category: str):
+        self.profile = profile
+        self.category = category
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profile.add(self.category, time.perf_counter() - self.started)
+
+
+def record_timing(category: str, seconds: float) -> None:
+    """
+    Add already measured time to the current request's profile, if any.
+    Args:
+        category (str): e.g. "db", "crypto" or "serialization".
+        seconds (float): Time spent.
+    """
+
+    profile = _profile_var.get()
+    if profile is not None:
+        profile.add(category, seconds)
+
+def timed(category: str):
+    """
+    Context manager timing its block into the current request's profile.
+    Outside profiled requests it is a shared no-op, costing one context
+    variable lookup, so it can stay on hot paths like token decoding.
+    Args:
+        category (str): e.g. "crypto".
+    """
+
+    profile = _profile_var.get()
+    return _NOT_PROFILED if profile is None else _Timer(profile, category)
+
+
+def _format_stats(profiler: cProfile.Profile) -> str:
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILING_TOP_FUNCTIONS)
+    return output.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling requests on demand.
+    A request is profiled when it carries `X-Profile: <PROFILING_TOKEN>`, or
+    for a PROFILING_SAMPLE_RATE share of requests. A profiled request gets a
+    time breakdown (database, pool wait, crypto, serialization, rest) and,
+    when no other request of this worker is being profiled, a cProfile of
+    its functions sorted by cumulative time. Both are logged to "app.profile"
+    with the request id. Requests profiled by header also get the breakdown
+    back in a Server-Timing header; sampled ones do not, so timings are never
+    exposed to ordinary clients.
+    cProfile sees everything the event loop runs meanwhile, including other
+    requests interleaved with this one; read it together with the breakdown,
+    which only counts this request's own work. Only added to the app when
+    PROFILING_TOKEN or PROFILING_SAMPLE_RATE is set.
+    """
+
+    _profiler_busy = False     # cProfile profiles the whole thread, one at a time
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._token = PROFILING_TOKEN.encode("latin-1")
+
+    def _trigger(self, scope: Scope) -> str | None:
+        if self._token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    if hmac.compare_digest(value, self._token):
+                        return "header"
+                    break
+        if PROFILING_SAMPLE_RATE and random.random() < PROFILING_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _profile_var.set(profile)
+        if not ProfilingMiddleware._profiler_busy:
+            ProfilingMiddleware._profiler_busy = True
+            profile.profiler = cProfile.Profile()
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trigger == "header":
+                    server_timing = profile.server_timing(time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing)]
+            await send(message)
+
+        try:
+            if profile.profiler is not None:
+                profile.profiler.enable()
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            total = time.perf_counter() - started
+            if profile.profiler is not None:
+                profile.profiler.disable()
+                ProfilingMiddleware._profiler_busy = False
+            _profile_var.reset(token)
+            requests_profiled_total.inc(trigger)
+            profile_logger.info(
+                "Profile of %s %s %d",
+                scope["method"],
+                scope["path"],
+                status_code,
+                extra={
+                    "trigger": trigger,
+                    "duration_ms": round(total * 1000, 3),
+                    "breakdown": profile.breakdown(total),
+                    "stats": _format_stats(profile.profiler) if profile.profiler is not None else None,
+                },
+            )
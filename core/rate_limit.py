@@ -0,0 +1,148 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from settings import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_MAX_KEYS,
+    LOGIN_IP_RATE_PER_MINUTE,
+    LOGIN_IP_BURST,
+    LOGIN_EMAIL_RATE_PER_MINUTE,
+    LOGIN_EMAIL_BURST,
+    REGISTER_IP_RATE_PER_MINUTE,
+    REGISTER_IP_BURST,
+    BULK_IMPORT_RATE_PER_MINUTE,
+    BULK_IMPORT_BURST,
+)
+from core.metrics import CallbackGauge, Counter
+
+
+class RateLimitExceededError(Exception):
+    """
+    Raised when a caller ran out of tokens. Routers translate it to
+    429 TOO MANY REQUESTS with a Retry-After header.
+    Attributes:
+        retry_after (int): Whole seconds until the next request would be allowed.
+    """
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__("Too many requests, try again later")
+
+
+rate_limit_rejected_total = Counter(
+    "rate_limit_rejected_total",
+    "Requests rejected by a rate limiter.",
+    ("limiter",),
+)
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets keyed by e.g. client IP or email.
+    Each key starts with `burst` tokens and regains `rate_per_minute` tokens
+    per minute; a request takes one token. Buckets are refilled lazily on
+    access, so an idle key costs nothing but its entry. At most `maxsize`
+    keys are tracked, the least recently used bucket is evicted beyond that
+    (an evicted key simply starts over with a full bucket).
+    Limits apply per worker process. Not thread safe, meant to be used from
+    the event loop.
+    Attributes:
+        name (str): Label of the limiter in metrics.
+        rate (float): Tokens regained per second.
+        burst (int): Bucket capacity.
+        maxsize (int): Maximum number of keys tracked.
+        evictions (int): Buckets dropped because the store was full.
+    """
+
+    def __init__(self, name: str, *, rate_per_minute: float, burst: int, maxsize: int):
+        self.name = name
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()   # key -> (tokens, updated)
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Take one token for key.
+        Returns:
+            float: 0 when the request is allowed, otherwise the seconds until
+                a token is available again.
+        """
+
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate if self.rate > 0 else 60.0
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+login_ip_limiter = TokenBucketLimiter(
+    "login_ip", rate_per_minute=LOGIN_IP_RATE_PER_MINUTE, burst=LOGIN_IP_BURST, maxsize=RATE_LIMIT_MAX_KEYS,
+)
+login_email_limiter = TokenBucketLimiter(
+    "login_email", rate_per_minute=LOGIN_EMAIL_RATE_PER_MINUTE, burst=LOGIN_EMAIL_BURST, maxsize=RATE_LIMIT_MAX_KEYS,
+)
+register_ip_limiter = TokenBucketLimiter(
+    "register_ip", rate_per_minute=REGISTER_IP_RATE_PER_MINUTE, burst=REGISTER_IP_BURST, maxsize=RATE_LIMIT_MAX_KEYS,
+)
+
+bulk_import_limiter = TokenBucketLimiter(
+    "bulk_import", rate_per_minute=BULK_IMPORT_RATE_PER_MINUTE, burst=BULK_IMPORT_BURST, maxsize=RATE_LIMIT_MAX_KEYS,
+)
+
+_limiters = (login_ip_limiter, login_email_limiter, register_ip_limiter, bulk_import_limiter)
+
+def check_rate_limits(*checks: tuple[TokenBucketLimiter, Hashable]) -> None:
+    """
+    Take a token from every (limiter, key) pair and fail if any is empty.
+    All buckets are charged even when an earlier one rejects, so an attacker
+    spreading attempts over many IPs still drains the per-email bucket.
+    Args:
+        *checks: (limiter, key) pairs, e.g. (login_ip_limiter, "203.0.113.7").
+    Raises:
+        RateLimitExceededError: If any bucket is empty, with the longest wait.
+    """
+
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    retry_after = 0.0
+    for limiter, key in checks:
+        wait = limiter.acquire(key)
+        if wait:
+            rate_limit_rejected_total.inc(limiter.name)
+            retry_after = max(retry_after, wait)
+    if retry_after:
+        raise RateLimitExceededError(retry_after)
+
+
+CallbackGauge(
+    "rate_limit_keys",
+    "Keys currently tracked by each rate limiter.",
+    ("limiter",),
+    lambda: [((limiter.name,), len(limiter)) for limiter in _limiters],
+)
+CallbackGauge(
+    "rate_limit_evictions_total",
+    "Rate limiter buckets evicted because the store was full.",
+    ("limiter",),
+    lambda: [((limiter.name,), limiter.evictions) for limiter in _limiters],
+    type="counter",
+)
@@ -0,0 +1,54 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from core.profiling import timed
+from settings import FAST_JSON_RESPONSES
+
+try:
+    import orjson
+except ImportError:     # Optional, FAST_JSON_RESPONSES falls back to the standard path
+    orjson = None
+
+
+# True when hot routes should skip response_model validation and render with orjson.
+FAST_JSON_ENABLED: bool = FAST_JSON_RESPONSES and orjson is not None
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Encode content as compact JSON bytes, with orjson when available.
+    Args:
+        content: JSON compatible data (dicts, lists, str, int, bool, None).
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+    """
+
+    with timed("serialization"):
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    The standard JSONResponse, with its rendering counted as serialization
+    in request profiles (see core.profiling).
+    """
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialization"):
+            return super().render(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+    Returned directly from a route, FastAPI skips response_model validation
+    and serialization, so the content must already match the schema. Use it
+    only with payloads built by the trusted dump helpers in the schemas modules.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
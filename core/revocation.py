@@ -0,0 +1,125 @@
+import time
+from datetime import datetime
+
+from settings import (
+    JWT_ACCESS_TOKEN_EXPIRE_MINUTES,
+    JWT_LEEWAY_SECONDS,
+    REVOCATION_MAX_STALENESS_SECONDS,
+)
+from core.metrics import CallbackGauge
+
+
+_CHUNK_BITS = 4096      # Session ids per bitmap chunk, 512 bytes each
+
+
+class SessionIdBitmap:
+    """
+    Set of session ids stored as a sparse bitmap.
+    Ids come from one sequence, so revoked ids cluster among the most recent
+    sessions and a handful of 512 byte chunks holds thousands of them, one
+    bit per id instead of a ~60 byte set entry.
+    """
+
+    def __init__(self):
+        self._chunks: dict[int, bytearray] = {}
+        self.count = 0
+
+    def add(self, session_id: int) -> None:
+        chunk_index, bit = divmod(session_id, _CHUNK_BITS)
+        chunk = self._chunks.get(chunk_index)
+        if chunk is None:
+            chunk = self._chunks[chunk_index] = bytearray(_CHUNK_BITS // 8)
+        byte, mask = bit >> 3, 1 << (bit & 7)
+        if not chunk[byte] & mask:
+            chunk[byte] |= mask
+            self.count += 1
+
+    def __contains__(self, session_id: int) -> bool:
+        chunk_index, bit = divmod(session_id, _CHUNK_BITS)
+        chunk = self._chunks.get(chunk_index)
+        return chunk is not None and bool(chunk[bit >> 3] & (1 << (bit & 7)))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._chunks) * (_CHUNK_BITS // 8)
+
+
+class RevocationFilter:
+    """
+    In-memory record of recently revoked session ids for stateless auth.
+    An access token outlives the revocation of its session by at most its
+    lifetime (a revoked session cannot mint new tokens), so an id only has
+    to be remembered for `window` seconds. Two bitmap generations are kept
+    and rotated every window: an id stays known for between one and two
+    windows, and memory stays bounded by the revocation rate, not by the
+    size of the sessions table.
+    The filter is fed by polling sessions.revoked_at (see
+    auth.services.run_revocation_refresher) and by logouts in this worker.
+    It is exact: no false positives, unlike a Bloom filter.
+    Not thread safe, meant to be used from the event loop.
+    Attributes:
+        window (float): Seconds a revoked id must be remembered.
+        watermark (datetime | None): Newest revoked_at seen, where the next poll resumes.
+        refreshed_at (float | None): time.monotonic() of the last successful poll.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.watermark: datetime | None = None
+        self.refreshed_at: float | None = None
+        self._current = SessionIdBitmap()
+        self._previous = SessionIdBitmap()
+        self._rotated_at = time.monotonic()
+
+    def _rotate(self) -> None:
+        now = time.monotonic()
+        if now - self._rotated_at >= self.window:
+            self._previous = self._current if now - self._rotated_at < 2 * self.window else SessionIdBitmap()
+            self._current = SessionIdBitmap()
+            self._rotated_at = now
+
+    def add(self, session_id: int) -> None:
+        self._rotate()
+        self._current.add(session_id)
+
+    def is_revoked(self, session_id: int) -> bool:
+        self._rotate()
+        return session_id in self._current or session_id in self._previous
+
+    def mark_refreshed(self, watermark: datetime | None) -> None:
+        """
+        Record a successful poll and where the next one resumes.
+        """
+
+        if watermark is not None and (self.watermark is None or watermark > self.watermark):
+            self.watermark = watermark
+        self.refreshed_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        """
+        Whether the last poll is recent enough to trust the filter.
+        Until the first poll, or after REVOCATION_MAX_STALENESS_SECONDS
+        without one, callers validate sessions against the database instead.
+        """
+
+        return (
+            self.refreshed_at is not None
+            and time.monotonic() - self.refreshed_at <= REVOCATION_MAX_STALENESS_SECONDS
+        )
+
+    def stats(self) -> dict:
+        return {
+            "revoked": self._current.count + self._previous.count,
+            "bytes": self._current.nbytes + self._previous.nbytes,
+            "staleness_seconds": time.monotonic() - self.refreshed_at if self.refreshed_at is not None else -1,
+        }
+
+
+revocation_filter = RevocationFilter(window=JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60 + JWT_LEEWAY_SECONDS)
+
+CallbackGauge(
+    "revocation_filter",
+    "Revoked session ids and bytes held by the revocation filter, and seconds since its last refresh (-1 before the first).",
+    ("stat",),
+    lambda: [((name,), value) for name, value in revocation_filter.stats().items()],
+)
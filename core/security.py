@@ -1,20 +1,96 @@
+import asyncio
+import hashlib
+import json
+import secrets
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
-from jose import jwt, JWTError
+from pathlib import Path
 
-from settings import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
+from settings import (
+    JWT_SECRET_KEY,
+    JWT_ALGORITHM,
+    JWT_ACCESS_TOKEN_EXPIRE_MINUTES,
+    JWT_KEYS_DIR,
+    JWT_ACTIVE_KID,
+    JWT_LEEWAY_SECONDS,
+    PASSWORD_HASH_SCHEME,
+    PASSWORD_BCRYPT_ROUNDS,
+    PASSWORD_ARGON2_TIME_COST,
+    PASSWORD_ARGON2_MEMORY_KIB,
+    PASSWORD_ARGON2_PARALLELISM,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_QUEUE,
+    PASSWORD_HASH_TIMEOUT_SECONDS,
+    PASSWORD_VERIFY_MAX_CONCURRENCY,
 )
+from core.metrics import Counter, Histogram
+from core.profiling import record_timing, timed
+
+PASSWORD_HASH_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_password_context(
+    scheme: str = PASSWORD_HASH_SCHEME,
+    *,
+    bcrypt_rounds: int = PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost: int = PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_kib: int = PASSWORD_ARGON2_MEMORY_KIB,
+    argon2_parallelism: int = PASSWORD_ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    Build the password hashing policy.
+    New hashes use `scheme` with the given cost; hashes of the other scheme,
+    or of the same scheme with a different cost, still verify but are
+    reported by needs_update(), so they are rehashed on the next login.
+    Args:
+        scheme (str): "bcrypt" or "argon2" (argon2id, needs argon2-cffi).
+        bcrypt_rounds (int): log2 of the bcrypt work factor.
+        argon2_time_cost (int): argon2 iterations.
+        argon2_memory_kib (int): argon2 memory per hash in KiB.
+        argon2_parallelism (int): argon2 lanes.
+    Returns:
+        CryptContext: The passlib context.
+    Raises:
+        ValueError: If scheme is not one of PASSWORD_HASH_SCHEMES.
+    """
+
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"Unknown password hash scheme {scheme!r}, expected one of {PASSWORD_HASH_SCHEMES}")
+
+    return CryptContext(
+        schemes=[scheme] + [other for other in PASSWORD_HASH_SCHEMES if other != scheme],
+        default=scheme,
+        deprecated="auto",
+        # min == max == default, so a changed cost in either direction is rehashed
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_kib,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+pwd_context = build_password_context()
 
 
 def hash_password(password: str) -> str:
     """
-    Hash a plaintext password using bcrypt.
-    Converts a plaintext password into a secure hashed representation
-    using the configured password context. The hash can be safely stored
+    Hash a plaintext password under the configured policy.
+    Converts a plaintext password into a secure hashed representation with
+    PASSWORD_HASH_SCHEME (bcrypt or argon2id) at its configured cost, taken
+    from the password context built at import. The hash can be safely stored
     in a database and later verified without exposing the original password.
     Args:
         password (str): The plaintext password to hash.
@@ -24,6 +100,22 @@ def hash_password(password: str) -> str:
 
     return pwd_context.hash(password)
 
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str,
+) -> tuple[bool, str | None]:
+    """
+    Verify a password and, if its hash is outdated, hash it again with the current policy.
+    Args:
+        plain_password: The plain text password to verify.
+        hashed_password: The stored hash to compare against.
+    Returns:
+        tuple[bool, str | None]: Whether the password matches, and the new hash
+            to store, or None when the stored hash is up to date.
+    """
+
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def verify_password(
     plain_password: str,
     hashed_password: str,
@@ -39,6 +131,401 @@ def verify_password(
     
     return pwd_context.verify(plain_password, hashed_password)
 
+
+# Async password hashing below:
+# bcrypt and argon2 are deliberately slow (~100-300 ms), so running it inside an async
+# service blocks the event loop for every other request. The coroutines below
+# push the work to a bounded worker pool instead.
+# ------------------------------------------------------------------
+
+class PasswordHasherBusyError(Exception):
+    """
+    Raised when the password hashing pool cannot take more work.
+    Either the queue of waiting jobs is full, or a job did not finish within
+    PASSWORD_HASH_TIMEOUT_SECONDS. Routers translate it to 503 SERVICE UNAVAILABLE.
+    """
+
+
+password_hash_duration_seconds = Histogram(
+    "password_hash_duration_seconds",
+    "Time to hash or verify a password on the worker pool, including queueing.",
+    ("operation",),
+)
+password_hash_rejected_total = Counter(
+    "password_hash_rejected_total",
+    "Hash/verify calls rejected because the pool was busy or timed out.",
+    ("reason",),
+)
+
+_hasher_executor: Executor | None = None
+_hasher_pending: int = 0                    # Jobs submitted to the pool and not finished yet
+_hasher_lock = threading.Lock()             # Done callbacks run on worker threads
+_verify_in_flight: int = 0                  # verify_password_async calls in progress, event loop only
+
+
+def _get_hasher_executor() -> Executor:
+    """
+    Create the password hashing pool on first use.
+    Returns:
+        Executor: A thread pool (bcrypt releases the GIL) or a process pool,
+            depending on PASSWORD_HASH_EXECUTOR.
+    """
+
+    global _hasher_executor
+    if _hasher_executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _hasher_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _hasher_executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hasher",
+            )
+    return _hasher_executor
+
+def _release_hasher_slot(_future) -> None:
+    global _hasher_pending
+    with _hasher_lock:
+        _hasher_pending -= 1
+
+async def _run_in_hasher(func, *args):
+    """
+    Run a blocking hashing function on the worker pool.
+    A slot is held from submission until the worker really finishes, so jobs
+    abandoned after a timeout still count against the queue limit.
+    Args:
+        func: A module-level (picklable) blocking function.
+        *args: Positional arguments for func.
+    Returns:
+        The return value of func.
+    Raises:
+        PasswordHasherBusyError: If the queue is full or the job timed out.
+    """
+
+    global _hasher_pending
+    with _hasher_lock:
+        if _hasher_pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+            password_hash_rejected_total.inc("queue_full")
+            raise PasswordHasherBusyError("Password hashing is busy, try again later")
+        _hasher_pending += 1
+
+    try:
+        future = _get_hasher_executor().submit(func, *args)
+    except BaseException:
+        _release_hasher_slot(None)
+        raise
+    future.add_done_callback(_release_hasher_slot)
+
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            timeout=PASSWORD_HASH_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        password_hash_rejected_total.inc("timeout")
+        raise PasswordHasherBusyError("Password hashing timed out, try again later")
+
+    password_hash_duration_seconds.observe(time.perf_counter() - started, func.__name__)
+    record_timing("crypto", time.perf_counter() - started)
+    return result
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a plaintext password on the worker pool without blocking the event loop.
+    Args:
+        password (str): The plaintext password to hash.
+    Returns:
+        str: The hashed password string.
+    Raises:
+        PasswordHasherBusyError: If the hashing pool is saturated.
+    """
+
+    return await _run_in_hasher(hash_password, password)
+
+async def _run_verify(func, *args):
+    """
+    Run a verification on the worker pool, shedding load above
+    PASSWORD_VERIFY_MAX_CONCURRENCY. Verifications are limited on their own
+    so a burst of logins is rejected early and cannot fill the whole hashing
+    queue that registrations share.
+    """
+
+    global _verify_in_flight
+    if _verify_in_flight >= PASSWORD_VERIFY_MAX_CONCURRENCY:
+        password_hash_rejected_total.inc("verify_limit")
+        raise PasswordHasherBusyError("Too many logins in progress, try again later")
+
+    _verify_in_flight += 1
+    try:
+        return await _run_in_hasher(func, *args)
+    finally:
+        _verify_in_flight -= 1
+
+async def verify_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> bool:
+    """
+    Verify a password on the worker pool without blocking the event loop.
+    Args:
+        plain_password: The plain text password to verify.
+        hashed_password: The hashed password to compare against.
+    Returns:
+        bool: True if the password matches the hash, False otherwise.
+    Raises:
+        PasswordHasherBusyError: If too many verifications are in progress
+            or the hashing pool is saturated.
+    """
+
+    return await _run_verify(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> tuple[bool, str | None]:
+    """
+    Verify a password and rehash it under the current policy if needed, in one pool job.
+    Args:
+        plain_password: The plain text password to verify.
+        hashed_password: The stored hash to compare against.
+    Returns:
+        tuple[bool, str | None]: Whether the password matches, and the new hash
+            to store, or None when the stored hash is up to date.
+    Raises:
+        PasswordHasherBusyError: If too many verifications are in progress
+            or the hashing pool is saturated.
+    """
+
+    return await _run_verify(verify_and_update_password, plain_password, hashed_password)
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    """
+    Hash many passwords in parallel on the worker pool.
+    Passwords are submitted PASSWORD_HASH_WORKERS at a time, so a large batch
+    keeps every worker busy without filling the queue that logins rely on.
+    Args:
+        passwords (list[str]): The plaintext passwords to hash.
+    Returns:
+        list[str]: The hashed passwords, in the same order.
+    Raises:
+        PasswordHasherBusyError: If the hashing pool is saturated.
+    """
+
+    hashed: list[str] = []
+    for start in range(0, len(passwords), PASSWORD_HASH_WORKERS):
+        batch = passwords[start:start + PASSWORD_HASH_WORKERS]
+        hashed.extend(await asyncio.gather(*(hash_password_async(p) for p in batch)))
+    return hashed
+
+async def warm_crypto_backends() -> None:
+    """
+    Initialize the hashing and JWT backends before the first request.
+    Loads passlib's hashing backend, starts every hashing pool worker (each
+    process imports this module when PASSWORD_HASH_EXECUTOR is "process"),
+    and runs one JWT encode/decode round trip, which also loads the signing
+    keys so a missing key fails the startup instead of the first login.
+    """
+
+    warmup_hash = await hash_password_async("warmup")
+    await asyncio.gather(*(
+        verify_password_async("warmup", warmup_hash)
+        for _ in range(PASSWORD_HASH_WORKERS)
+    ))
+    decode_access_token(create_access_token(user_id=0, session_id=0))
+
+def calibrate_password_hashing(
+    scheme: str,
+    target_ms: float,
+    *,
+    samples: int = 3,
+    argon2_memory_kib: int = PASSWORD_ARGON2_MEMORY_KIB,
+    argon2_parallelism: int = PASSWORD_ARGON2_PARALLELISM,
+) -> tuple[dict, float]:
+    """
+    Find the highest hashing cost that stays within target_ms on this machine.
+    For bcrypt the rounds are raised from 10, for argon2 the time cost from 1
+    at a fixed memory cost, until the median of `samples` hashes exceeds the
+    budget. Run it on the production hardware, on an otherwise idle machine.
+    Args:
+        scheme (str): "bcrypt" or "argon2".
+        target_ms (float): Budget for a single hash in milliseconds.
+        samples (int): Hashes timed per candidate cost.
+        argon2_memory_kib (int): Fixed argon2 memory cost.
+        argon2_parallelism (int): Fixed argon2 lanes.
+    Returns:
+        tuple[dict, float]: The settings to apply (env name -> value) and the
+            measured milliseconds per hash at that cost.
+    """
+
+    def measure(context: CryptContext) -> float:
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            context.hash("calibration-password")
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)[len(timings) // 2]
+
+    if scheme == "bcrypt":
+        costs, low, high = "PASSWORD_BCRYPT_ROUNDS", 10, 20
+        build = lambda cost: build_password_context("bcrypt", bcrypt_rounds=cost)
+    else:
+        costs, low, high = "PASSWORD_ARGON2_TIME_COST", 1, 50
+        build = lambda cost: build_password_context(
+            scheme,
+            argon2_time_cost=cost,
+            argon2_memory_kib=argon2_memory_kib,
+            argon2_parallelism=argon2_parallelism,
+        )
+
+    best_cost, best_ms = low, measure(build(low))
+    for cost in range(low + 1, high + 1):
+        elapsed = measure(build(cost))
+        if elapsed > target_ms:
+            break
+        best_cost, best_ms = cost, elapsed
+
+    chosen = {"PASSWORD_HASH_SCHEME": scheme, costs: best_cost}
+    if scheme == "argon2":
+        chosen["PASSWORD_ARGON2_MEMORY_KIB"] = argon2_memory_kib
+        chosen["PASSWORD_ARGON2_PARALLELISM"] = argon2_parallelism
+    return chosen, best_ms
+
+def shutdown_password_hasher() -> None:
+    """
+    Stop the password hashing pool. Call it once on application shutdown.
+    """
+
+    global _hasher_executor
+    if _hasher_executor is not None:
+        _hasher_executor.shutdown(wait=False, cancel_futures=True)
+        _hasher_executor = None
+
+# JWT signing keys below:
+# With EdDSA or RS256 tokens are signed with a private key and carry its id
+# in the "kid" header; every public key is published at
+# /.well-known/jwks.json, so other services verify tokens locally.
+# Rotation: add a new <kid>.pem to JWT_KEYS_DIR and restart, switch
+# JWT_ACTIVE_KID to it once consumers refreshed their JWKS, and replace the
+# old private key with its <kid>.pub.pem once its tokens expired.
+# ------------------------------------------------------------------
+
+JWT_ALGORITHMS = ("EdDSA", "RS256", "HS256")
+_PUBLIC_KEY_TYPES = {"EdDSA": ed25519.Ed25519PublicKey, "RS256": rsa.RSAPublicKey}
+_JWK_ENCODERS = {"EdDSA": OKPAlgorithm, "RS256": RSAAlgorithm}
+
+
+class SigningKeys:
+    """
+    The keys tokens are signed and verified with, parsed once.
+    Attributes:
+        algorithm (str): The JWT algorithm.
+        signing_kid (str | None): The "kid" put in new tokens, None for HS256.
+        signing_key: The private key object (or the HS256 secret) new tokens are signed with.
+        verification_keys (dict): kid -> public key object (or the HS256 secret under None).
+        headers (dict | None): The extra JWT headers of new tokens.
+        jwks (bytes): The rendered JWK Set of every public key.
+    """
+
+    def __init__(self, algorithm: str, signing_kid: str | None, signing_key, verification_keys: dict):
+        self.algorithm = algorithm
+        self.signing_kid = signing_kid
+        self.signing_key = signing_key
+        self.verification_keys = verification_keys
+        self.headers = {"kid": signing_kid} if signing_kid else None
+
+        keys = []
+        if algorithm in _JWK_ENCODERS:
+            for kid, public_key in verification_keys.items():
+                jwk = _JWK_ENCODERS[algorithm].to_jwk(public_key, as_dict=True)
+                keys.append({**jwk, "kid": kid, "alg": algorithm, "use": "sig"})
+        self.jwks = json.dumps({"keys": keys}, separators=(",", ":")).encode()
+
+
+def load_signing_keys(
+    algorithm: str = JWT_ALGORITHM,
+    keys_dir: str = JWT_KEYS_DIR,
+    active_kid: str | None = JWT_ACTIVE_KID,
+) -> SigningKeys:
+    """
+    Load the JWT keys from keys_dir.
+    Every <kid>.pem holds an unencrypted PEM private key, every <kid>.pub.pem
+    a public key that still verifies tokens but no longer signs any. For
+    HS256, JWT_SECRET_KEY is used and keys_dir is ignored.
+    Args:
+        algorithm (str): "EdDSA", "RS256" or "HS256".
+        keys_dir (str): Directory with the key files.
+        active_kid (str | None): The key that signs new tokens; defaults to
+            the last private key in name order.
+    Returns:
+        SigningKeys: The parsed keys.
+    Raises:
+        RuntimeError: If the algorithm is unknown, no usable key is found,
+            or a key does not match the algorithm.
+    """
+
+    if algorithm not in JWT_ALGORITHMS:
+        raise RuntimeError(f"Unknown JWT_ALGORITHM {algorithm!r}, expected one of {JWT_ALGORITHMS}")
+    if algorithm == "HS256":
+        if not JWT_SECRET_KEY:
+            raise RuntimeError("JWT_ALGORITHM=HS256 needs JWT_SECRET_KEY")
+        return SigningKeys(algorithm, None, JWT_SECRET_KEY, {None: JWT_SECRET_KEY})
+
+    public_type = _PUBLIC_KEY_TYPES[algorithm]
+    private_keys, public_keys = {}, {}
+    for path in sorted(Path(keys_dir).glob("*.pem")):
+        data = path.read_bytes()
+        if path.name.endswith(".pub.pem"):
+            kid = path.name.removesuffix(".pub.pem")
+            public_keys[kid] = serialization.load_pem_public_key(data)
+        else:
+            kid = path.name.removesuffix(".pem")
+            private_keys[kid] = serialization.load_pem_private_key(data, password=None)
+            public_keys[kid] = private_keys[kid].public_key()
+        if not isinstance(public_keys[kid], public_type):
+            raise RuntimeError(f"JWT key {path} is not a {algorithm} key")
+
+    if not private_keys:
+        raise RuntimeError(
+            f"No JWT signing key in {keys_dir!r}, create one with `python cli.py generate-jwt-key`"
+        )
+    signing_kid = active_kid or list(private_keys)[-1]
+    if signing_kid not in private_keys:
+        raise RuntimeError(f"JWT_ACTIVE_KID {signing_kid!r} has no private key in {keys_dir!r}")
+    return SigningKeys(algorithm, signing_kid, private_keys[signing_kid], public_keys)
+
+def generate_signing_key(algorithm: str = JWT_ALGORITHM) -> bytes:
+    """
+    Create a new private key for JWT signing.
+    Args:
+        algorithm (str): "EdDSA" (Ed25519) or "RS256" (RSA 2048).
+    Returns:
+        bytes: The unencrypted PKCS8 PEM private key.
+    """
+
+    if algorithm == "EdDSA":
+        key = ed25519.Ed25519PrivateKey.generate()
+    elif algorithm == "RS256":
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        raise ValueError(f"Cannot generate a key for {algorithm!r}")
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+_signing_keys: SigningKeys | None = None
+
+def get_signing_keys() -> SigningKeys:
+    """
+    Return the JWT keys, loading them on first use.
+    """
+
+    global _signing_keys
+    if _signing_keys is None:
+        _signing_keys = load_signing_keys()
+    return _signing_keys
+
 def create_access_token(
     *,
     user_id: int,
@@ -56,7 +543,7 @@ def create_access_token(
     Returns:
         str: The encoded JWT access token.
     Raises:
-        Exception: If there is an error during token creation.
+        RuntimeError: If no signing key is configured (see load_signing_keys).
     Usage:
         token = create_access_token(user_id=123, session_id=456)
     """
@@ -64,30 +551,62 @@ def create_access_token(
     # expire = datetime.utcnow() + (
     #     expires_delta or timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     # )
-    expire = datetime.now(timezone.utc) + (
+    issued_at = datetime.now(timezone.utc)
+    expire = issued_at + (
         expires_delta or timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     )
 
     payload = {
         "sub": str(user_id),
         "sid": session_id,
+        "iat": issued_at,
         "exp": expire,
     }
 
-    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    keys = get_signing_keys()
+    with timed("crypto"):
+        return jwt.encode(payload, keys.signing_key, algorithm=keys.algorithm, headers=keys.headers)
+
+def generate_refresh_token_secret() -> str:
+    """
+    Generate the random secret part of a refresh token.
+    Returns:
+        str: A URL-safe random string with 256 bits of entropy.
+    """
+
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token_secret(secret: str) -> str:
+    """
+    Hash a refresh token secret for storage in sessions.refresh_token_hash.
+    The secret is high-entropy random data, not a user-chosen password, so a
+    single SHA-256 is enough and costs microseconds instead of a bcrypt round.
+    Args:
+        secret (str): The random secret part of the refresh token.
+    Returns:
+        str: The hex encoded SHA-256 digest.
+    """
+
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
 
 def decode_access_token(token: str) -> dict:
     """
     Decode an access token and return the payload as a dictionary.
+    The verification key is picked by the token's "kid" header among the
+    already parsed keys, so tokens signed by any published key are accepted.
     Args:
         token (str): The JWT access token to decode.
     Returns:
         dict: The decoded payload if the token is valid, otherwise an empty dictionary.
-    Raises:
-        JWTError: If the token is invalid or cannot be decoded.
     """
 
+    keys = get_signing_keys()
     try:
-        return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-    except JWTError:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = keys.verification_keys.get(kid)
+        if key is None:
+            return {}
+        with timed("crypto"):
+            return jwt.decode(token, key, algorithms=[keys.algorithm], leeway=JWT_LEEWAY_SECONDS)
+    except jwt.PyJWTError:
         return {}
@@ -0,0 +1,104 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Hashable
+
+from core.metrics import Counter
+
+
+repository_flights_total = Counter(
+    "repository_flights_total",
+    "Repository reads that ran a query, by function.",
+    ("function",),
+)
+repository_calls_collapsed_total = Counter(
+    "repository_calls_collapsed_total",
+    "Repository reads answered by joining an identical read already in flight, by function.",
+    ("function",),
+)
+
+
+class _LeaderCancelled(Exception):
+    """
+    Handed to waiting callers when the call running the query was cancelled,
+    e.g. because its client disconnected. They then run the query themselves.
+    """
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one.
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result, or its exception. Nothing is
+    kept once the call finishes, so this only removes duplicate work, it never
+    serves a result older than one in-flight query.
+    Not thread safe, meant to be used from the event loop.
+    Attributes:
+        name (str): Label of the wrapped function in metrics.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn(), or wait for the identical call already running under key.
+        Args:
+            key: Identifies identical calls.
+            fn: Starts the call when this caller is the first for key.
+        Returns:
+            The result of fn(), shared by every caller of the flight.
+        """
+
+        flight = self._calls.get(key)
+        if flight is not None:
+            repository_calls_collapsed_total.inc(self.name)
+            try:
+                return await asyncio.shield(flight)    # A cancelled waiter must not cancel the flight
+            except _LeaderCancelled:
+                return await fn()
+
+        flight = asyncio.get_running_loop().create_future()
+        flight.add_done_callback(lambda done: done.exception())    # No "exception never retrieved" without waiters
+        self._calls[key] = flight
+        repository_flights_total.inc(self.name)
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.set_exception(_LeaderCancelled())
+            raise
+        except Exception as exc:
+            flight.set_exception(exc)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+def single_flight(func):
+    """
+    Decorator collapsing concurrent identical calls of a repository read.
+    Calls are identical when their arguments after the session are equal and
+    they read from the same database (primary, or the same replica), so a
+    primary retry after a replica miss is never answered by the replica's
+    flight. The result is shared between callers running on different
+    sessions, so only decorate reads returning plain values, like Principal:
+    an ORM object belongs to the leader's session, and a rollback there
+    expires it under the other callers. Callers that need the query to run
+    on their own connection (e.g. to warm it up) call the undecorated
+    function, `func.__wrapped__`.
+    Args:
+        func: An async repository function taking the AsyncSession first and
+            hashable arguments after it.
+    """
+
+    flight = SingleFlight(func.__name__)
+
+    @functools.wraps(func)
+    async def wrapper(db, *args, **kwargs):
+        key = (db.info.get("replica"), args, tuple(sorted(kwargs.items())))
+        return await flight.do(key, lambda: func(db, *args, **kwargs))
+
+    return wrapper
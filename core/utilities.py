@@ -0,0 +1,25 @@
+from typing import AsyncIterable, AsyncIterator
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a stream of byte chunks into non-empty lines.
+    Used to read NDJSON request bodies (eg. request.stream()) without loading
+    the whole body into memory. Lines are not decoded here, so one line of
+    invalid UTF-8 can be rejected on its own instead of failing the stream.
+    Args:
+        chunks (AsyncIterable[bytes]): The raw byte chunks.
+    Yields:
+        bytes: Each non-blank line, stripped of surrounding whitespace.
+    """
+
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line.strip()
+
+    if buffer.strip():
+        yield buffer.strip()
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from settings import (
+    WRITE_BEHIND_FLUSH_SECONDS,
+    WRITE_BEHIND_FLUSH_SIZE,
+    WRITE_BEHIND_MAX_PENDING,
+)
+from core.metrics import CallbackGauge, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+write_behind_entries_total = Counter(
+    "write_behind_entries_total",
+    "Entries handled by write-behind buffers, by outcome "
+    "(queued, coalesced, flushed, dropped: buffer full, failed: flush error).",
+    ("buffer", "outcome"),
+)
+write_behind_flush_duration_seconds = Histogram(
+    "write_behind_flush_duration_seconds",
+    "Time to write one batch of a write-behind buffer.",
+    ("buffer",),
+)
+
+_buffers: list = []
+
+
+class WriteBehindBuffer:
+    """
+    Collects writes in memory and flushes them in batches from a background task.
+    Entries added with a key are coalesced: a later entry for a pending key
+    is merged into it (e.g. keeping the newest last-seen time per session),
+    so a hot key costs one row per flush however often it is written.
+    A flush runs every `flush_interval` seconds, as soon as `flush_size`
+    entries are pending, and once more on stop(). At most `max_pending`
+    entries are held; beyond that new entries are dropped and counted, so
+    a slow or unreachable database costs bounded memory, not the request path.
+    A batch whose flush fails is dropped and counted as well.
+    Not thread safe, meant to be used from the event loop.
+    Attributes:
+        name (str): Label of the buffer in metrics and logs.
+        flush (Callable): Writes one batch, a list of entries, to the database.
+        merge (Callable | None): Combines a pending entry with a new one for the same key.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[list], Awaitable[None]],
+        *,
+        merge: Callable[[Any, Any], Any] | None = None,
+        flush_interval: float = WRITE_BEHIND_FLUSH_SECONDS,
+        flush_size: int = WRITE_BEHIND_FLUSH_SIZE,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+    ):
+        self.name = name
+        self.flush = flush
+        self.merge = merge
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self._pending: dict[Hashable, Any] = {}
+        self._sequence = itertools.count()      # Keys for entries that are never coalesced
+        self._wake = asyncio.Event()
+        self._stopping = False
+        _buffers.append(self)
+
+    def add(self, entry: Any, key: Hashable | None = None) -> None:
+        """
+        Queue an entry, merging it into the pending entry with the same key.
+        Args:
+            entry: The value handed to flush().
+            key: Coalescing key, None for entries that are all kept.
+        """
+
+        if key is not None:
+            key = ("key", key)      # Never collides with the sequence numbers of unkeyed entries
+            if key in self._pending:
+                self._pending[key] = self.merge(self._pending[key], entry) if self.merge else entry
+                write_behind_entries_total.inc(self.name, "coalesced")
+                return
+
+        if len(self._pending) >= self.max_pending:
+            write_behind_entries_total.inc(self.name, "dropped")
+            return
+
+        self._pending[next(self._sequence) if key is None else key] = entry
+        write_behind_entries_total.inc(self.name, "queued")
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def flush_pending(self) -> None:
+        """
+        Write everything pending, in batches of flush_size.
+        """
+
+        entries = list(self._pending.values())
+        self._pending = {}
+        for start in range(0, len(entries), self.flush_size):
+            batch = entries[start:start + self.flush_size]
+            started = time.perf_counter()
+            try:
+                await self.flush(batch)
+            except Exception:
+                write_behind_entries_total.inc(self.name, "failed", amount=len(batch))
+                logger.exception("Write-behind flush of %s failed, %d entries lost", self.name, len(batch))
+                continue
+            write_behind_flush_duration_seconds.observe(time.perf_counter() - started, self.name)
+            write_behind_entries_total.inc(self.name, "flushed", amount=len(batch))
+
+    async def run(self) -> None:
+        """
+        Flush on the interval or size threshold until stop(), then flush once more.
+        """
+
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush_pending()
+        await self.flush_pending()
+
+    def stop(self) -> None:
+        """
+        Ask run() to write what is pending and return. Await its task afterwards.
+        """
+
+        self._stopping = True
+        self._wake.set()
+
+
+CallbackGauge(
+    "write_behind_pending",
+    "Entries waiting in each write-behind buffer.",
+    ("buffer",),
+    lambda: [((buffer.name,), len(buffer)) for buffer in _buffers],
+)
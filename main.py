@@ -1,16 +1,119 @@
-import uvicorn
-from fastapi import FastAPI, Depends
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 
-from core.database import get_db
-from settings import HOST, PORT
+from core.database import engine, get_pool_stats, prewarm_pool, replicas
+from core.health import health_prober
+from core.security import get_signing_keys, shutdown_password_hasher, warm_crypto_backends
+from core.metrics import Gauge, MetricsMiddleware, render_metrics
+from core.logging import RequestContextMiddleware, configure_logging, shutdown_logging
+from core.responses import FAST_JSON_ENABLED, FastJSONResponse, TimedJSONResponse
+from core.profiling import ProfilingMiddleware
+from settings import (
+    HOST,
+    PORT,
+    SESSION_SWEEPER_ENABLED,
+    AUTH_STATELESS_ENABLED,
+    STARTUP_WARMUP_ENABLED,
+    DB_POOL_PREWARM_CONNECTIONS,
+    JWKS_CACHE_SECONDS,
+    PROFILING_TOKEN,
+    PROFILING_SAMPLE_RATE,
+)
 from users.routers import router as users_router
+from users.repositories import get_user_by_email
 from auth.routers import router as auth_router
+from auth.repositories import get_principal
+from auth.services import auth_audit, run_revocation_refresher, run_session_sweeper, session_activity
 
+logger = logging.getLogger(__name__)
+
+app_startup_seconds = Gauge(
+    "app_startup_seconds",
+    "Time spent in the lifespan startup (warmup) of this worker.",
+)
+
+
+async def warm_queries(db: AsyncSession):
+    """
+    Execute the per-request hot queries once on a pooled connection.
+    Fills SQLAlchemy's compiled statement cache and the connection's asyncpg
+    prepared statement cache, so the first real request skips both.
+    get_principal is called undecorated: every connection is warmed at the
+    same time, and single-flight would run the query on only one of them.
+    Args:
+        db (AsyncSession): A session bound to the connection being warmed.
+    """
+
+    await get_principal.__wrapped__(db, 0)
+    await get_user_by_email(db, "")
+
+async def warm_up():
+    """
+    Prewarm the connection pool and the crypto backends before serving.
+    A database that is not reachable yet only logs an error, the pool then
+    connects lazily as before.
+    """
+
+    try:
+        opened = await prewarm_pool(DB_POOL_PREWARM_CONNECTIONS, warmup=warm_queries)
+        logger.info("Prewarmed %d database connections", opened)
+    except (SQLAlchemyError, OSError):
+        logger.exception("Database pool prewarm failed")
+
+    await warm_crypto_backends()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up and start background tasks on startup, release everything on shutdown.
+    Args:
+        app (FastAPI): The FastAPI application instance.
+    """
+
+    started = time.perf_counter()
+    if STARTUP_WARMUP_ENABLED:
+        await warm_up()
+    app_startup_seconds.set(value=time.perf_counter() - started)
+    logger.info("Startup finished in %.1f ms", (time.perf_counter() - started) * 1000)
+
+    background_tasks = [asyncio.create_task(health_prober.run())]
+    if SESSION_SWEEPER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_session_sweeper()))
+    if AUTH_STATELESS_ENABLED:
+        background_tasks.append(asyncio.create_task(run_revocation_refresher()))
+    write_behind = {buffer: asyncio.create_task(buffer.run()) for buffer in (session_activity, auth_audit)}
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    for buffer, task in write_behind.items():    # Flush what is pending before the engine goes away
+        buffer.stop()
+        await task
+    shutdown_password_hasher()
+    await engine.dispose()
+    for replica in replicas:
+        await replica.engine.dispose()
+    shutdown_logging()
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    configure_logging()
+    app = FastAPI(
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse if FAST_JSON_ENABLED else TimedJSONResponse,
+    )
+    if PROFILING_TOKEN or PROFILING_SAMPLE_RATE:
+        app.add_middleware(ProfilingMiddleware)    # Innermost, so it times only the app itself
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(RequestContextMiddleware)    # Outermost, so every log line has the request id
     # config cors
     register_routers(app)
     return app
@@ -36,13 +139,56 @@ app: FastAPI= create_app()
 async def app_health_check() -> str:
     return "Yokoso(ようこそ)!"
 
+# Liveness: answers as long as the event loop runs, never touches the pool.
+@app.get("/health/live")
+async def liveness_check():
+    return {"status": "alive"}
+
+# Readiness: the health prober's last result, no database work per request.
+@app.get("/health/ready")
+async def readiness_check():
+    snapshot = health_prober.current()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
 @app.get("/health/db")
-async def db_health_check(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(text("SELECT 1"))
-    return {"db": result.scalar()}
+async def db_health_check():
+    snapshot = health_prober.current()
+    db = snapshot.get("db", {"ok": False})
+    return JSONResponse({"db": int(db["ok"]), **db}, status_code=200 if db["ok"] else 503)
+
+@app.get("/health/pool")
+async def pool_health_check():
+    return get_pool_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        render_metrics(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+# Token verification keys below:
+# ------------------------------------------------------------------
+
+@app.get("/.well-known/jwks.json")
+async def jwks():
+    """
+    Publish the public keys access tokens are signed with (RFC 7517 JWK Set).
+    Other services verify tokens locally by the token's "kid"; the body is
+    rendered once when the keys are loaded and may be cached by clients.
+    """
+
+    return Response(
+        get_signing_keys().jwks,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={JWKS_CACHE_SECONDS}"},
+    )
 
 
 if __name__ == "__main__":
+    import uvicorn  # Only needed to run the dev server, not when a server imports main:app
+
     uvicorn.run(
         app="main:app", 
         host=HOST, 
@@ -51,9 +197,7 @@ if __name__ == "__main__":
     )
 
 
-# lifespan
 # CORS
-# loggers
 # Exception handling everywhere
 # jwt authentication
 
@@ -73,3 +217,5 @@ if __name__ == "__main__":
 # router layer setup
 # Bluprint and api routers
 # Pydantic validation
+# lifespan
+# loggers
@@ -0,0 +1,136 @@
+"""
+Production entry point: multi-process uvicorn.
+
+    python server.py [--workers 8] [--max-requests 50000] [--max-requests-jitter 5000] [--connection-budget 80]
+
+- Starts SERVER_WORKERS worker processes (defaults to the CPU count); uvicorn's
+  supervisor restarts any worker that exits.
+- Uses uvloop and httptools when installed (pip install "uvicorn[standard]").
+- With a DB_CONNECTION_BUDGET, each worker's pool is sized so all workers
+  together never open more than the budget.
+- The hashing pool gets an equal share of the CPUs per worker.
+- SIGTERM stops accepting connections and drains in-flight requests for up
+  to SERVER_GRACEFUL_TIMEOUT_SECONDS before the lifespan shutdown runs.
+- With SERVER_MAX_REQUESTS, a worker exits gracefully after that many
+  requests and is replaced, capping memory growth. Each worker adds a random
+  0..SERVER_MAX_REQUESTS_JITTER (default a tenth of the limit) to its limit,
+  like gunicorn's max_requests_jitter, so workers that share the load evenly
+  do not all restart, and warm up, at the same moment.
+
+For development keep using `python main.py` (single process, reload).
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import random
+
+import uvicorn
+from dotenv import load_dotenv
+from uvicorn.supervisors import Multiprocess
+
+logger = logging.getLogger("server")
+
+
+def per_worker_pool(budget: int, workers: int) -> tuple[int, int]:
+    """
+    Split a global connection budget into a per-worker pool size and overflow.
+    Three quarters of each worker's share are kept open, the rest is overflow
+    for bursts.
+    Args:
+        budget (int): Connections allowed for all workers together.
+        workers (int): Number of worker processes.
+    Returns:
+        tuple[int, int]: (pool_size, max_overflow) for each worker.
+    """
+
+    share = max(1, budget // workers)
+    pool_size = max(1, share - share // 4)
+    return pool_size, share - pool_size
+
+def configure_worker_env(workers: int, connection_budget: int) -> None:
+    """
+    Export per-worker settings before any worker (or settings.py) is loaded.
+    Workers are separate processes that read settings.py from the environment,
+    so this is how the launcher passes them their share of the resources.
+    Explicitly set PASSWORD_HASH_WORKERS values are left alone.
+    """
+
+    if connection_budget:
+        pool_size, max_overflow = per_worker_pool(connection_budget, workers)
+        os.environ["DB_POOL_SIZE"] = str(pool_size)
+        os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+
+class JitteredConfig(uvicorn.Config):
+    """
+    uvicorn Config that randomizes limit_max_requests per worker process.
+    load() runs in each worker after it is spawned (and again in every
+    replacement), so every process draws its own jitter.
+    Attributes:
+        max_requests_jitter (int): Upper bound of the random requests added to the limit.
+    """
+
+    def __init__(self, *args, max_requests_jitter: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_requests_jitter = max_requests_jitter
+
+    def load(self) -> None:
+        super().load()
+        if self.limit_max_requests and self.max_requests_jitter > 0:
+            self.limit_max_requests += random.randint(0, self.max_requests_jitter)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SERVER_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--max-requests", type=int, default=int(os.environ.get("SERVER_MAX_REQUESTS", 0)))
+    parser.add_argument("--max-requests-jitter", type=int, default=os.environ.get("SERVER_MAX_REQUESTS_JITTER"))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.environ.get("SERVER_GRACEFUL_TIMEOUT_SECONDS", 30)))
+    parser.add_argument("--connection-budget", type=int, default=int(os.environ.get("DB_CONNECTION_BUDGET", 0)))
+    args = parser.parse_args()
+    if args.max_requests_jitter is None:
+        args.max_requests_jitter = args.max_requests // 10
+
+    configure_worker_env(args.workers, args.connection_budget)
+
+    from settings import HOST, PORT, DB_POOL_SIZE, DB_MAX_OVERFLOW, PASSWORD_HASH_WORKERS
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info(
+        "Starting %d workers on %s:%d (loop=%s, http=%s, pool=%d+%d, hashers=%d, max_requests=%s)",
+        args.workers, HOST, PORT, loop, http, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+        PASSWORD_HASH_WORKERS,
+        f"{args.max_requests}+0..{args.max_requests_jitter}" if args.max_requests else "off",
+    )
+
+    # uvicorn.run() without the Config it builds, so the jittered one can be used
+    config = JitteredConfig(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        limit_max_requests=args.max_requests or None,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=False,           # RequestContextMiddleware writes sampled access logs
+        proxy_headers=True,
+        log_config=None,            # core.logging configures logging in each worker
+        max_requests_jitter=args.max_requests_jitter,
+    )
+    server = uvicorn.Server(config)
+    if config.workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,110 @@ PG_PROJECTS_DATABASE: str= os.environ.get("PG_PROJECTS_DATABASE")
 PG_PROJECTS_URL = f"postgresql+asyncpg://{PG_USERNAME}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_PROJECTS_DATABASE}"
 
 # JWT token keys
-JWT_SECRET_KEY: str = os.environ.get("JWT_SECRET_KEY")      # Secret key for signing tokens
-JWT_ALGORITHM = "HS256"                                     # Algorithm used for token encoding
+JWT_SECRET_KEY: str = os.environ.get("JWT_SECRET_KEY")      # Secret key for signing tokens (HS256 only)
+JWT_ALGORITHM: str = os.environ.get("JWT_ALGORITHM", "HS256" if JWT_SECRET_KEY else "EdDSA")   # "EdDSA", "RS256", or "HS256" with JWT_SECRET_KEY
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 15                        # Token expiration time in minutes
+JWT_KEYS_DIR: str = os.environ.get("JWT_KEYS_DIR", "keys")      # <kid>.pem private keys, <kid>.pub.pem verify-only keys
+JWT_ACTIVE_KID: str | None = os.environ.get("JWT_ACTIVE_KID")   # Signing key id, defaults to the last private key by name
+JWT_LEEWAY_SECONDS: float = float(os.environ.get("JWT_LEEWAY_SECONDS", 30))  # Clock skew tolerated on exp/iat
+JWKS_CACHE_SECONDS: int = int(os.environ.get("JWKS_CACHE_SECONDS", 300))     # Cache-Control max-age of /.well-known/jwks.json
+
+# Password hashing policy (tune with `python cli.py calibrate-hashing`)
+PASSWORD_HASH_SCHEME: str = os.environ.get("PASSWORD_HASH_SCHEME", "bcrypt")                      # "bcrypt" or "argon2" (needs argon2-cffi)
+PASSWORD_BCRYPT_ROUNDS: int = int(os.environ.get("PASSWORD_BCRYPT_ROUNDS", 12))                    # log2 of the bcrypt work factor
+PASSWORD_ARGON2_TIME_COST: int = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", 3))               # argon2id iterations
+PASSWORD_ARGON2_MEMORY_KIB: int = int(os.environ.get("PASSWORD_ARGON2_MEMORY_KIB", 65536))         # argon2id memory per hash
+PASSWORD_ARGON2_PARALLELISM: int = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", 1))           # argon2id lanes, 1 keeps one hash per worker thread
+PASSWORD_HASH_TARGET_MS: float = float(os.environ.get("PASSWORD_HASH_TARGET_MS", 250))            # Default calibration budget per hash
+
+# Password hashing worker pool
+PASSWORD_HASH_EXECUTOR: str = os.environ.get("PASSWORD_HASH_EXECUTOR", "thread")                  # "thread" or "process"
+PASSWORD_HASH_WORKERS: int = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))    # Parallel bcrypt workers
+PASSWORD_HASH_MAX_QUEUE: int = int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", 64))                 # Waiting jobs before answering 503
+PASSWORD_HASH_TIMEOUT_SECONDS: float = float(os.environ.get("PASSWORD_HASH_TIMEOUT_SECONDS", 5))  # Max wait for a single hash/verify
+PASSWORD_VERIFY_MAX_CONCURRENCY: int = int(os.environ.get(
+    "PASSWORD_VERIFY_MAX_CONCURRENCY", PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE // 2
+))                                                                                                  # Logins in bcrypt at once, leaves room for registrations
+
+# Authenticated session/user lookup cache (per process)
+AUTH_CACHE_MAX_SIZE: int = int(os.environ.get("AUTH_CACHE_MAX_SIZE", 10_000))           # Entries per cache before LRU eviction
+AUTH_CACHE_TTL_SECONDS: float = float(os.environ.get("AUTH_CACHE_TTL_SECONDS", 60))     # Upper bound on staleness across workers
+
+# Database connection pool (per worker process)
+DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", 10))                                   # Persistent connections kept open
+DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", 10))                             # Extra connections opened under burst
+DB_POOL_TIMEOUT_SECONDS: float = float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", 5))          # Max wait to acquire a connection
+DB_POOL_RECYCLE_SECONDS: int = int(os.environ.get("DB_POOL_RECYCLE_SECONDS", 1800))           # Reopen connections older than this
+DB_POOL_PRE_PING: bool = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"         # Check liveness on checkout
+DB_STATEMENT_CACHE_SIZE: int = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 500))            # asyncpg prepared statements per connection
+
+# Bulk user import
+BULK_IMPORT_CHUNK_SIZE: int = int(os.environ.get("BULK_IMPORT_CHUNK_SIZE", 1000))   # Rows per duplicate check + multi-row INSERT
+BULK_IMPORT_RESULTS_MEMORY_BYTES: int = int(os.environ.get("BULK_IMPORT_RESULTS_MEMORY_BYTES", 1024 * 1024))   # Per-row results kept in memory before spilling to a temp file
+
+# User listing
+USERS_EXPORT_BATCH_SIZE: int = int(os.environ.get("USERS_EXPORT_BATCH_SIZE", 1000))   # Rows fetched per server-side cursor round trip
+
+# Expired session sweeper
+SESSION_SWEEPER_ENABLED: bool = os.environ.get("SESSION_SWEEPER_ENABLED", "true").lower() == "true"
+SESSION_SWEEP_INTERVAL_SECONDS: float = float(os.environ.get("SESSION_SWEEP_INTERVAL_SECONDS", 300))   # Pause between sweeps
+SESSION_SWEEP_BATCH_SIZE: int = int(os.environ.get("SESSION_SWEEP_BATCH_SIZE", 1000))                  # Rows deleted per statement
+SESSION_RETENTION_HOURS: int = int(os.environ.get("SESSION_RETENTION_HOURS", 24))                      # Keep sessions this long after expiry
+
+# Logging
+LOG_LEVEL: str = os.environ.get("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE: int = int(os.environ.get("LOG_QUEUE_SIZE", 10_000))                       # Records buffered before dropping
+LOG_ACCESS_SAMPLE_RATE: float = float(os.environ.get("LOG_ACCESS_SAMPLE_RATE", 0.1))       # Share of successful requests logged
+
+# Responses
+FAST_JSON_RESPONSES: bool = os.environ.get("FAST_JSON_RESPONSES", "false").lower() == "true"   # orjson rendering, no re-validation on hot routes
+
+# Startup warmup
+STARTUP_WARMUP_ENABLED: bool = os.environ.get("STARTUP_WARMUP_ENABLED", "true").lower() == "true"
+DB_POOL_PREWARM_CONNECTIONS: int = int(os.environ.get("DB_POOL_PREWARM_CONNECTIONS", DB_POOL_SIZE))   # Opened before serving, capped at DB_POOL_SIZE
+
+# Production server (server.py)
+SERVER_WORKERS: int = int(os.environ.get("SERVER_WORKERS", os.cpu_count() or 1))                 # Worker processes
+SERVER_MAX_REQUESTS: int = int(os.environ.get("SERVER_MAX_REQUESTS", 0))                         # Recycle a worker after this many requests, 0 = never
+SERVER_MAX_REQUESTS_JITTER: int = int(os.environ.get("SERVER_MAX_REQUESTS_JITTER", SERVER_MAX_REQUESTS // 10))   # Random 0..N added per worker so workers do not all restart together
+SERVER_GRACEFUL_TIMEOUT_SECONDS: int = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT_SECONDS", 30)) # Drain time for in-flight requests on SIGTERM
+DB_CONNECTION_BUDGET: int = int(os.environ.get("DB_CONNECTION_BUDGET", 0))                       # Connections for all workers together, 0 = use DB_POOL_SIZE/DB_MAX_OVERFLOW as is
+
+# Read replicas
+PG_REPLICA_URLS: list[str] = [url.strip() for url in os.environ.get("PG_REPLICA_URLS", "").split(",") if url.strip()]   # postgresql+asyncpg://... per replica
+REPLICA_EJECT_SECONDS: float = float(os.environ.get("REPLICA_EJECT_SECONDS", 30))                       # Skip a failing replica for this long
+REPLICA_READ_YOUR_WRITES_SECONDS: float = float(os.environ.get("REPLICA_READ_YOUR_WRITES_SECONDS", 10)) # Tokens younger than this read from the primary
+
+# Rate limiting (token buckets per worker process)
+RATE_LIMIT_ENABLED: bool = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_MAX_KEYS: int = int(os.environ.get("RATE_LIMIT_MAX_KEYS", 100_000))                      # Buckets per limiter before LRU eviction
+LOGIN_IP_RATE_PER_MINUTE: float = float(os.environ.get("LOGIN_IP_RATE_PER_MINUTE", 30))             # Login attempts per client IP
+LOGIN_IP_BURST: int = int(os.environ.get("LOGIN_IP_BURST", 10))
+LOGIN_EMAIL_RATE_PER_MINUTE: float = float(os.environ.get("LOGIN_EMAIL_RATE_PER_MINUTE", 5))        # Login attempts per target email
+LOGIN_EMAIL_BURST: int = int(os.environ.get("LOGIN_EMAIL_BURST", 5))
+REGISTER_IP_RATE_PER_MINUTE: float = float(os.environ.get("REGISTER_IP_RATE_PER_MINUTE", 10))       # Registrations per client IP
+REGISTER_IP_BURST: int = int(os.environ.get("REGISTER_IP_BURST", 5))
+BULK_IMPORT_RATE_PER_MINUTE: float = float(os.environ.get("BULK_IMPORT_RATE_PER_MINUTE", 1))       # Bulk imports per admin account
+BULK_IMPORT_BURST: int = int(os.environ.get("BULK_IMPORT_BURST", 2))
+
+# Stateless token validation (trust the JWT, check an in-memory revocation filter)
+AUTH_STATELESS_ENABLED: bool = os.environ.get("AUTH_STATELESS_ENABLED", "false").lower() == "true"
+REVOCATION_REFRESH_SECONDS: float = float(os.environ.get("REVOCATION_REFRESH_SECONDS", 2))              # Poll interval for new revocations
+REVOCATION_MAX_STALENESS_SECONDS: float = float(os.environ.get("REVOCATION_MAX_STALENESS_SECONDS", 30)) # Older filter: fall back to the database
+
+# Health probes (one background prober per worker, endpoints serve its last result)
+HEALTH_PROBE_INTERVAL_SECONDS: float = float(os.environ.get("HEALTH_PROBE_INTERVAL_SECONDS", 2))    # How often the database and loop are probed
+HEALTH_DB_TIMEOUT_SECONDS: float = float(os.environ.get("HEALTH_DB_TIMEOUT_SECONDS", 2))            # SELECT 1 slower than this counts as down
+HEALTH_MAX_LOOP_LAG_SECONDS: float = float(os.environ.get("HEALTH_MAX_LOOP_LAG_SECONDS", 0.5))      # Event loop lag above this: not ready
+HEALTH_MAX_POOL_SATURATION: float = float(os.environ.get("HEALTH_MAX_POOL_SATURATION", 1.0))        # Checked out / (pool size + overflow) at which: not ready
+
+# Write-behind buffers (session last-seen times, auth audit events)
+WRITE_BEHIND_FLUSH_SECONDS: float = float(os.environ.get("WRITE_BEHIND_FLUSH_SECONDS", 5))     # Flush at least this often
+WRITE_BEHIND_FLUSH_SIZE: int = int(os.environ.get("WRITE_BEHIND_FLUSH_SIZE", 1000))            # Flush early at this many pending entries, also the batch size
+WRITE_BEHIND_MAX_PENDING: int = int(os.environ.get("WRITE_BEHIND_MAX_PENDING", 50_000))        # Entries held per buffer before new ones are dropped
+
+# Profiling and slow query log
+PROFILING_TOKEN: str = os.environ.get("PROFILING_TOKEN", "")                                      # Requests sending "X-Profile: <token>" are profiled, empty = off
+PROFILING_SAMPLE_RATE: float = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))                  # Share of all requests profiled
+PROFILING_TOP_FUNCTIONS: int = int(os.environ.get("PROFILING_TOP_FUNCTIONS", 30))                 # Functions listed per logged cProfile
+DB_SLOW_QUERY_SECONDS: float = float(os.environ.get("DB_SLOW_QUERY_SECONDS", 0.5))                # Statements slower than this are logged, 0 = off
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Boolean
+from sqlalchemy import String, Boolean, false
 from sqlalchemy.orm import Mapped, mapped_column
 from core.database import Base
 
@@ -10,6 +10,7 @@ class User(Base):
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     hashed_password: Mapped[str] = mapped_column(String(255))
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    is_admin: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
     
     """
     User model representing a user account in the system.
@@ -20,6 +21,8 @@ class User(Base):
         hashed_password (str): Bcrypt hashed password for secure storage (max 255 characters).
         is_active (bool): Flag indicating whether the user account is active.
             Defaults to True when a new user is created.
+        is_admin (bool): Grants the admin-only routes (listing, exporting and
+            bulk importing users). Only set from the command line, never by the API.
     Notes:
         The `index=True` on the email field creates a database index, which optimizes
         query performance when filtering or searching users by email address. This is
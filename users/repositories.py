@@ -1,5 +1,7 @@
+from typing import AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Row, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from .models import User
 
@@ -9,27 +11,28 @@ async def create_user(
     *,
     email: str,
     hashed_password: str,
-) -> User:
+) -> User | None:
     """
-    Create a new user in the database.
-    This coroutine function creates a new User instance with the provided email and hashed password,
-    persists it to the database, and returns the created user object with all database-generated fields populated.
+    Create a new user in the database, unless the email is already taken.
+    This coroutine issues a single INSERT ... ON CONFLICT (email) DO NOTHING RETURNING
+    statement, so the new row (with its generated id and defaults) comes back in the
+    same round trip and concurrent signups for one email cannot both succeed.
     Args:
         db (AsyncSession): An asynchronous SQLAlchemy database session used to interact with the database.
         email (str): The email address of the user to be created.
         hashed_password (str): The hashed password for the user account.
     Returns:
-        User: The newly created User object with all fields including any database-generated identifiers.
-    Raises:
-        sqlalchemy.exc.IntegrityError: If a user with the given email already exists (assuming email uniqueness constraint).
+        User | None: The newly created User object with all fields populated,
+                     or None if a user with this email already exists.
     """
-    user = User(
-        email=email,
-        hashed_password=hashed_password,
+    stmt = (
+        pg_insert(User)
+        .values(email=email, hashed_password=hashed_password)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
     )
-    db.add(user)            # Adds object to session, No DB call yet
-    await db.commit()       # INSERT happens here
-    await db.refresh(user)  # Fetches DB-generated values, eg. id,defaults etc. Keep ORM object in sync
+    user = await db.scalar(stmt)    # INSERT and fetch of DB-generated values in one round trip
+    await db.commit()
     return user
 
 async def get_user_by_email(
@@ -53,23 +56,159 @@ async def get_user_by_email(
     result = await db.execute(stmt)
     return result.scalar_one_or_none()  # Return one object or None if no such user
 
-async def get_user_by_id(
+async def list_users(
+    db: AsyncSession,
+    *,
+    after_id: int | None = None,
+    limit: int = 50,
+) -> list[User]:
+    """
+    Return one page of users ordered by id, using keyset pagination.
+    Instead of OFFSET, which scans and discards every skipped row, the page
+    starts right after the last id seen, so every page costs one index range scan.
+    Args:
+        db (AsyncSession): An async SQLAlchemy session object for database operations.
+        after_id (int | None): The last id of the previous page, None for the first page.
+        limit (int): Maximum number of users to return.
+    Returns:
+        list[User]: Up to `limit` users with id greater than after_id.
+    """
+    stmt = select(User).order_by(User.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+async def stream_users(
+    db: AsyncSession,
+    *,
+    batch_size: int,
+) -> AsyncIterator[Row]:
+    """
+    Stream every user through a server-side cursor.
+    Rows are fetched `batch_size` at a time and only the columns needed for
+    UserRead are selected, so memory stays constant regardless of table size.
+    Args:
+        db (AsyncSession): An async SQLAlchemy session object for database operations.
+        batch_size (int): Rows fetched per cursor round trip.
+    Yields:
+        Row: Rows with id, email and is_active attributes, ordered by id.
+    """
+    stmt = (
+        select(User.id, User.email, User.is_active)
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    async for row in result:
+        yield row
+
+async def set_user_active(
     db: AsyncSession,
     id: int,
-) -> User | None:
+    is_active: bool,
+) -> bool:
     """
-    Retrieve a user from the database by their id.
-    This function queries the database to find a user with the specified id.
-    It performs an asynchronous database lookup using SQLAlchemy's select statement.
+    Activate or deactivate a user account.
     Args:
         db (AsyncSession): An async SQLAlchemy session object for database operations.
-        id (int): The id of the user to retrieve.
+        id (int): The id of the user to update.
+        is_active (bool): The new active flag.
     Returns:
-        User | None: A User object if a user with the given id exists,
-                     otherwise None if no matching user is found.
-    Raises:
-        None: This function does not raise exceptions; it returns None for no matches.
+        bool: True if a user with the given id was updated, otherwise False.
     """
-    stmt = select(User).where(User.id == id)
+    stmt = update(User).where(User.id == id).values(is_active=is_active)
     result = await db.execute(stmt)
-    return result.scalar_one_or_none()  # Return one object or None if no such user
+    await db.commit()
+    return result.rowcount > 0
+
+async def set_user_admin(
+    db: AsyncSession,
+    email: str,
+    is_admin: bool,
+) -> bool:
+    """
+    Grant or revoke admin rights of a user account.
+    Args:
+        db (AsyncSession): An async SQLAlchemy session object for database operations.
+        email (str): The email of the user to update.
+        is_admin (bool): The new admin flag.
+    Returns:
+        bool: True if a user with the given email was updated, otherwise False.
+    """
+    stmt = update(User).where(User.email == email).values(is_admin=is_admin)
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount > 0
+
+async def update_password_hash(
+    db: AsyncSession,
+    id: int,
+    old_hash: str,
+    new_hash: str,
+) -> bool:
+    """
+    Replace a user's password hash, unless it changed since it was read.
+    The WHERE on the old hash makes the swap a compare-and-set, so a rehash
+    on login never overwrites a password changed concurrently.
+    Args:
+        db (AsyncSession): An async SQLAlchemy session object for database operations.
+        id (int): The id of the user to update.
+        old_hash (str): The hash the new one was derived from.
+        new_hash (str): The hash under the current hashing policy.
+    Returns:
+        bool: True if the hash was replaced, otherwise False.
+    """
+    stmt = (
+        update(User)
+        .where(User.id == id, User.hashed_password == old_hash)
+        .values(hashed_password=new_hash)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount > 0
+
+async def get_existing_emails(
+    db: AsyncSession,
+    emails: list[str],
+) -> set[str]:
+    """
+    Return which of the given emails are already registered.
+    One set-based query instead of a lookup per email.
+    Args:
+        db (AsyncSession): An async SQLAlchemy session object for database operations.
+        emails (list[str]): The email addresses to check.
+    Returns:
+        set[str]: The subset of emails that already exist.
+    """
+    if not emails:
+        return set()
+    stmt = select(User.email).where(User.email.in_(emails))
+    result = await db.execute(stmt)
+    return set(result.scalars().all())
+
+async def bulk_create_users(
+    db: AsyncSession,
+    rows: list[dict],
+) -> dict[str, int]:
+    """
+    Insert many users with one multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING.
+    Rows whose email already exists (eg. inserted concurrently) are skipped
+    by the database instead of failing the whole batch.
+    Args:
+        db (AsyncSession): An async SQLAlchemy session object for database operations.
+        rows (list[dict]): Rows with "email" and "hashed_password" keys.
+    Returns:
+        dict[str, int]: Mapping of inserted email -> new user id. Skipped emails are absent.
+    """
+    if not rows:
+        return {}
+    stmt = (
+        pg_insert(User)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id, User.email)
+    )
+    result = await db.execute(stmt, [{"is_active": True, **row} for row in rows])
+    created = {email: id for id, email in result.all()}
+    await db.commit()
+    return created
@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
-from core.database import get_db
+from core.database import get_db, get_read_db
+from core.dependencies import require_admin
+from core.responses import FAST_JSON_ENABLED, FastJSONResponse, dump_json
+from core.security import PasswordHasherBusyError
+from core.rate_limit import RateLimitExceededError, bulk_import_limiter, check_rate_limits, register_ip_limiter
+from core.utilities import iter_lines
 from users import services
-from users.schemas import UserCreate, UserRead
+from users.schemas import UserCreate, UserRead, UserPage, BulkUserResult
+from settings import BULK_IMPORT_RESULTS_MEMORY_BYTES
 
 router = APIRouter(
     prefix="/users",
@@ -17,6 +27,7 @@ router = APIRouter(
 )
 async def register_user(
     payload: UserCreate,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -25,6 +36,7 @@ async def register_user(
     Args:
         payload (UserCreate): Request body containing user registration details
             (email and password).
+        request (Request): The incoming request, its client address keys the rate limit.
         db (AsyncSession): Database session dependency for executing queries.
             Defaults to get_db() dependency.
     Returns:
@@ -32,18 +44,160 @@ async def register_user(
     Raises:
         HTTPException: With status code 409 CONFLICT if the email already exists
             in the system or other validation errors occur.
+        HTTPException: With status code 429 TOO MANY REQUESTS if the client IP
+            registered too many accounts recently.
+        HTTPException: With status code 503 SERVICE UNAVAILABLE if the password
+            hashing pool is saturated.
     """
     
     try:
+        check_rate_limits((register_ip_limiter, request.client.host if request.client else None))
         user = await services.register_user(
             db,
             email=payload.email,
             password=payload.password,
         )
+        if FAST_JSON_ENABLED:
+            return FastJSONResponse(UserRead.dump_trusted(user), status_code=status.HTTP_201_CREATED)
         return user
 
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=str(exc),
-        )
\ No newline at end of file
+        )
+
+    except RateLimitExceededError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    except PasswordHasherBusyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        )
+
+@router.post(
+    "/bulk",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One BulkUserResult JSON object per input line, in input order.",
+            "content": {"application/x-ndjson": {"schema": BulkUserResult.model_json_schema()}},
+        }
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def bulk_register_users(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_admin),
+):
+    """
+    Register many users from a streamed NDJSON body. Admin only.
+    Each line of the request body is a UserCreate JSON object, eg.
+    {"email": "a@example.com", "password": "secret"}. The body is read as a
+    stream and processed in chunks, and the per-line results are spooled to
+    a temporary file beyond BULK_IMPORT_RESULTS_MEMORY_BYTES, so uploads of
+    any size run in bounded memory. The results are sent once the whole body
+    is read: answering while the client is still uploading could stall a
+    client that only reads after sending.
+    Args:
+        request (Request): The incoming request whose body is NDJSON.
+        db (AsyncSession): Database session dependency for executing queries.
+        current_user: The authenticated caller, must be an admin.
+    Returns:
+        StreamingResponse: An application/x-ndjson stream of BulkUserResult
+            objects, one per non-blank input line.
+    Raises:
+        HTTPException: With status code 403 FORBIDDEN if the caller is not an admin.
+        HTTPException: With status code 429 TOO MANY REQUESTS if the caller
+            started too many imports recently.
+    """
+
+    try:
+        check_rate_limits((bulk_import_limiter, current_user.user_id))
+    except RateLimitExceededError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+    results = tempfile.SpooledTemporaryFile(max_size=BULK_IMPORT_RESULTS_MEMORY_BYTES)
+    try:
+        async for result in services.bulk_register_users(db, iter_lines(request.stream())):
+            results.write(dump_json(result) + b"\n")
+        results.seek(0)
+    except BaseException:
+        results.close()
+        raise
+
+    return StreamingResponse(
+        iter(lambda: results.read(64 * 1024), b""),     # Sync iterator, read in the threadpool
+        media_type="application/x-ndjson",
+        background=BackgroundTask(results.close),
+    )
+
+@router.get(
+    "",
+    response_model=UserPage,
+)
+async def list_users(
+    after: int | None = Query(None, description="Cursor: the last user id of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(require_admin),
+):
+    """
+    List users ordered by id, one keyset-paginated page at a time. Admin only.
+    Args:
+        after (int | None): The next_cursor of the previous page, omitted for the first page.
+        limit (int): Page size, between 1 and 500.
+        db (AsyncSession): Read database session dependency, may be a replica.
+        current_user: The authenticated caller, must be an admin.
+    Returns:
+        UserPage: The page of users and the cursor for the next page.
+    """
+
+    page = await services.get_users_page(db, after_id=after, limit=limit)
+    if FAST_JSON_ENABLED:
+        return FastJSONResponse({
+            "items": [UserRead.dump_trusted(user) for user in page["items"]],
+            "next_cursor": page["next_cursor"],
+        })
+    return page
+
+@router.get("/export")
+async def export_users(
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(require_admin),
+):
+    """
+    Export every user as NDJSON, one UserRead object per line. Admin only.
+    Rows are streamed from a server-side cursor straight into the response,
+    so exports of any size run in constant memory.
+    Args:
+        db (AsyncSession): Read database session dependency, kept open while streaming.
+        current_user: The authenticated caller, must be an admin.
+    Returns:
+        StreamingResponse: An application/x-ndjson stream of users.
+    """
+
+    async def lines():
+        async for row in services.export_users(db):
+            if FAST_JSON_ENABLED:
+                yield dump_json(UserRead.dump_trusted(row)) + b"\n"
+            else:
+                yield UserRead.model_validate(row).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -16,3 +16,23 @@ class UserRead(BaseModel):
         # to read data from objects with attributes, such as 
         # SQLAlchemy ORM instances.
 
+    @staticmethod
+    def dump_trusted(user) -> dict:
+        """
+        Serialize a User (or a row with the same columns) without validation.
+        The values come straight from our own database, so the from_attributes
+        round trip through pydantic adds CPU without catching anything.
+        """
+        return {"id": user.id, "email": user.email, "is_active": user.is_active}
+
+
+class UserPage(BaseModel):
+    items: list[UserRead]
+    next_cursor: int | None     # Pass as ?after= to get the next page, None on the last page
+
+class BulkUserResult(BaseModel):
+    line: int
+    email: str | None
+    status: str         # "created", "duplicate", "invalid" or "failed"
+    id: int | None
+    detail: str | None
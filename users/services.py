@@ -1,7 +1,29 @@
+from typing import AsyncIterable, AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from users.repositories import get_user_by_email, create_user
-from core.security import hash_password, verify_password
+from users.repositories import (
+    get_user_by_email,
+    create_user,
+    set_user_active,
+    update_password_hash,
+    get_existing_emails,
+    bulk_create_users,
+    list_users,
+    stream_users,
+)
+from users.schemas import UserCreate
+from auth.repositories import revoke_user_sessions
+from core.cache import principal_cache
+from core.revocation import revocation_filter
+from core.security import (
+    PasswordHasherBusyError,
+    hash_password_async,
+    hash_passwords_async,
+    verify_and_update_password_async,
+)
+from settings import BULK_IMPORT_CHUNK_SIZE, USERS_EXPORT_BATCH_SIZE
 
 
 async def register_user(
@@ -12,9 +34,9 @@ async def register_user(
 ):
     """
     Register a new user with the provided email and password.
-    This function creates a new user account after validating that the email
-    is not already registered in the system. The password is hashed before
-    storage for security purposes.
+    The password is hashed before storage for security purposes. Duplicate
+    emails are detected by the database from the result of the INSERT itself,
+    so there is no separate lookup and no race between concurrent signups.
     Args:
         db (AsyncSession): The asynchronous database session for querying and creating records.
         email (str): The email address for the new user account.
@@ -23,14 +45,10 @@ async def register_user(
         User: The newly created user object with hashed password.
     Raises:
         ValueError: If a user with the provided email already exists in the database.
+        PasswordHasherBusyError: If the password hashing pool is saturated.
     """
 
-    existing_user = await get_user_by_email(db, email)
-
-    if existing_user:
-        raise ValueError("User with this email already exists")
-
-    hashed_pw = hash_password(password)
+    hashed_pw = await hash_password_async(password)
 
     user = await create_user(
         db,
@@ -38,6 +56,9 @@ async def register_user(
         hashed_password=hashed_pw,
     )
 
+    if user is None:
+        raise ValueError("User with this email already exists")
+
     return user
 
 async def authenticate_user(
@@ -52,6 +73,9 @@ async def authenticate_user(
     the provided password against the stored hashed password. If the user
     is found and the password is correct, the user object is returned.
     Otherwise, None is returned.
+    When the stored hash was made under an older hashing policy (another
+    scheme or cost), it is replaced with a hash under the current policy, so
+    stored hashes migrate as users log in.
     Args:
         db (AsyncSession): The asynchronous database session.
         email (str): The email address of the user to authenticate.
@@ -59,6 +83,8 @@ async def authenticate_user(
     Returns:
         User | None: The authenticated user object if credentials are valid,
                      otherwise None.
+    Raises:
+        PasswordHasherBusyError: If the password hashing pool is saturated.
     """
     
     user = await get_user_by_email(db, email)
@@ -66,7 +92,175 @@ async def authenticate_user(
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not valid:
         return None
 
+    if new_hash is not None:
+        await update_password_hash(db, user.id, user.hashed_password, new_hash)
+
     return user
+
+async def deactivate_user(
+    db: AsyncSession,
+    *,
+    user_id: int,
+):
+    """
+    Deactivate a user account.
+    All of the user's sessions are revoked as well, so tokens that are
+    validated statelessly stop working too. They are dropped from the auth
+    principal cache and added to the revocation filter, so the change is
+    visible to authenticated requests in this worker immediately.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        user_id (int): The id of the user to deactivate.
+    Raises:
+        ValueError: If no user with the given id exists.
+    """
+
+    updated = await set_user_active(db, user_id, False)
+    for session_id in await revoke_user_sessions(db, user_id):
+        revocation_filter.add(session_id)
+    principal_cache.invalidate_where(lambda principal: principal.user_id == user_id)
+
+    if not updated:
+        raise ValueError("User not found")
+
+async def bulk_register_users(
+    db: AsyncSession,
+    lines: AsyncIterable[bytes],
+    *,
+    chunk_size: int = BULK_IMPORT_CHUNK_SIZE,
+) -> AsyncIterator[dict]:
+    """
+    Register many users from NDJSON lines, one chunk at a time.
+    Each line is a UserCreate JSON object. Per chunk: duplicate emails are
+    found with one set-based query, passwords are hashed in parallel on the
+    worker pool, and new users are written with one multi-row INSERT. Only
+    one chunk is held in memory, so input size is unbounded.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        lines (AsyncIterable[bytes]): Undecoded NDJSON lines, eg. from core.utilities.iter_lines.
+            A line that is not valid UTF-8 is reported as invalid.
+        chunk_size (int): Number of rows processed per round trip.
+    Yields:
+        dict: One result per input line, in order, containing:
+            - line (int): 1-based line number.
+            - email (str | None): The email, if the line could be parsed.
+            - status (str): "created", "duplicate", "invalid" or "failed".
+            - id (int | None): The new user id when created.
+            - detail (str | None): The reason when not created.
+    """
+
+    chunk: list[tuple[int, UserCreate | None, str | None]] = []
+    line_no = 0
+
+    async for line in lines:
+        line_no += 1
+        try:
+            chunk.append((line_no, UserCreate.model_validate_json(line.decode("utf-8")), None))
+        except UnicodeDecodeError:
+            chunk.append((line_no, None, "Line is not valid UTF-8"))
+        except ValidationError as exc:
+            chunk.append((line_no, None, exc.errors(include_url=False)[0]["msg"]))
+
+        if len(chunk) >= chunk_size:
+            for result in await _register_chunk(db, chunk):
+                yield result
+            chunk = []
+
+    for result in await _register_chunk(db, chunk):
+        yield result
+
+async def _register_chunk(
+    db: AsyncSession,
+    chunk: list[tuple[int, UserCreate | None, str | None]],
+) -> list[dict]:
+    """
+    Register one chunk of parsed rows for bulk_register_users.
+    """
+
+    results: dict[int, dict] = {}
+    pending: dict[str, tuple[int, UserCreate]] = {}
+
+    for line_no, user, error in chunk:
+        if user is None:
+            results[line_no] = _bulk_result(line_no, None, "invalid", detail=error)
+        elif user.email in pending:
+            results[line_no] = _bulk_result(line_no, user.email, "duplicate", detail="Duplicate email in batch")
+        else:
+            pending[user.email] = (line_no, user)
+
+    try:
+        existing = await get_existing_emails(db, list(pending))
+        for email in existing:
+            line_no, _ = pending.pop(email)
+            results[line_no] = _bulk_result(line_no, email, "duplicate", detail="User with this email already exists")
+
+        hashed = await hash_passwords_async([user.password for _, user in pending.values()])
+        created = await bulk_create_users(
+            db,
+            [
+                {"email": email, "hashed_password": hashed_pw}
+                for email, hashed_pw in zip(pending, hashed)
+            ],
+        )
+    except (PasswordHasherBusyError, SQLAlchemyError) as exc:
+        await db.rollback()
+        for email, (line_no, _) in pending.items():
+            results[line_no] = _bulk_result(line_no, email, "failed", detail=str(exc))
+    else:
+        for email, (line_no, _) in pending.items():
+            if email in created:
+                results[line_no] = _bulk_result(line_no, email, "created", id=created[email])
+            else:
+                results[line_no] = _bulk_result(line_no, email, "duplicate", detail="User with this email already exists")
+
+    return [results[line_no] for line_no, _, _ in chunk]
+
+def _bulk_result(
+    line: int,
+    email: str | None,
+    status: str,
+    *,
+    id: int | None = None,
+    detail: str | None = None,
+) -> dict:
+    return {"line": line, "email": email, "status": status, "id": id, "detail": detail}
+
+async def get_users_page(
+    db: AsyncSession,
+    *,
+    after_id: int | None,
+    limit: int,
+) -> dict:
+    """
+    Fetch one keyset-paginated page of users.
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        after_id (int | None): The cursor returned with the previous page.
+        limit (int): Page size.
+    Returns:
+        dict: A dictionary containing:
+            - items (list[User]): The users of this page.
+            - next_cursor (int | None): Cursor for the next page, None on the last page.
+    """
+
+    users = await list_users(db, after_id=after_id, limit=limit)
+    return {
+        "items": users,
+        "next_cursor": users[-1].id if len(users) == limit else None,
+    }
+
+async def export_users(db: AsyncSession) -> AsyncIterator:
+    """
+    Iterate over every user through a server-side cursor.
+    Args:
+        db (AsyncSession): The asynchronous database session, must stay open while iterating.
+    Yields:
+        Row: Rows with id, email and is_active, ordered by id.
+    """
+
+    async for row in stream_users(db, batch_size=USERS_EXPORT_BATCH_SIZE):
+        yield row